@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useTheme } from '../context/ThemeContext';
 import { useToast } from '../context/ToastContext';
 import { leadsService } from '../services/api';
@@ -7,6 +7,12 @@ import {
   CheckCircle, XCircle, Clock, FileSpreadsheet, AlertTriangle
 } from 'lucide-react';
 
+// Acompanhamento do disparo: intervalo entre consultas, teto do backoff em
+// caso de erro e tempo máximo antes de deixar o envio seguir em segundo plano
+const POLL_INTERVALO_MS = 2000;
+const POLL_INTERVALO_MAX_MS = 30000;
+const POLL_TEMPO_MAX_MS = 30 * 60 * 1000;
+
 export default function Enviar() {
   const { darkMode } = useTheme();
   const toast = useToast();
@@ -18,6 +24,7 @@ export default function Enviar() {
   const [enviando, setEnviando] = useState(false);
   const [resultado, setResultado] = useState(null);
   const [statusFilter, setStatusFilter] = useState('processado');
+  const desmontado = useRef(false);
 
   const cardStyle = {
     backgroundColor: darkMode ? '#1e293b' : '#ffffff',
@@ -45,6 +52,12 @@ export default function Enviar() {
     loadLotes();
   }, []);
 
+  useEffect(() => {
+    desmontado.current = false;
+    // Interrompe o acompanhamento do disparo ao sair da página
+    return () => { desmontado.current = true; };
+  }, []);
+
   const loadLotes = () => {
     try {
       const saved = localStorage.getItem('leadmanager_lotes');
@@ -96,6 +109,32 @@ export default function Enviar() {
     }
   };
 
+  // Consulta o progresso até o disparo terminar. Erros de rede são repetidos
+  // com backoff. Retorna null se a página foi desmontada e
+  // { status: 'tempo_esgotado' } se passar de POLL_TEMPO_MAX_MS.
+  const acompanharDisparo = async (disparoId) => {
+    const inicio = Date.now();
+    let intervalo = POLL_INTERVALO_MS;
+    let result = null;
+    while (!desmontado.current) {
+      try {
+        result = await leadsService.getProgresso(disparoId);
+        if (desmontado.current) return null;
+        setResultado(result);
+        if (result.status !== 'em_andamento') return result;
+        intervalo = POLL_INTERVALO_MS;
+      } catch (error) {
+        console.error('Erro ao consultar progresso:', error);
+        intervalo = Math.min(intervalo * 2, POLL_INTERVALO_MAX_MS);
+      }
+      if (Date.now() - inicio > POLL_TEMPO_MAX_MS) {
+        return { ...result, status: 'tempo_esgotado' };
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalo));
+    }
+    return null;
+  };
+
   const enviarParaBitrix = async () => {
     if (!resumo || resumo.processados === 0) {
       toast.warning('Não há leads processados para enviar');
@@ -103,10 +142,20 @@ export default function Enviar() {
     }
     setEnviando(true);
     try {
-      const result = await leadsService.enviar(selectedLote.id);
-      setResultado(result);
-      updateLoteStatus(selectedLote.id, 'enviado');
-      toast.success(`${result.enviados_sucesso} leads enviados com sucesso!`);
+      const { disparo_id } = await leadsService.enviar(selectedLote.id);
+      // O envio roda em background: acompanha o progresso até finalizar
+      const result = await acompanharDisparo(disparo_id);
+      if (!result) return;
+      if (result.status === 'tempo_esgotado') {
+        toast.warning('O envio continua em segundo plano. Acompanhe pelo histórico.');
+        return;
+      }
+      if (result.status === 'erro') {
+        toast.error(result.erro || 'Erro ao enviar leads');
+      } else {
+        updateLoteStatus(selectedLote.id, 'enviado');
+        toast.success(`${result.enviados_sucesso} leads enviados com sucesso!`);
+      }
       // Recarregar resumo
       const resumoData = await leadsService.getResumo(selectedLote.id);
       setResumo(resumoData);
@@ -114,9 +163,11 @@ export default function Enviar() {
       setLeads(leadsData.leads || []);
       setStatusFilter('enviado');
     } catch (error) {
-      toast.error(error.response?.data?.detail || 'Erro ao enviar leads');
+      if (!desmontado.current) {
+        toast.error(error.response?.data?.detail || 'Erro ao enviar leads');
+      }
     } finally {
-      setEnviando(false);
+      if (!desmontado.current) setEnviando(false);
     }
   };
 
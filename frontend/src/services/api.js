@@ -149,6 +149,11 @@ export const leadsService = {
     return response.data;
   },
 
+  getProgresso: async (disparoId) => {
+    const response = await api.get(`/leads/disparos/${disparoId}/progresso`);
+    return response.data;
+  },
+
   getHistorico: async (skip = 0, limit = 100) => {
     const response = await api.get(`/leads/historico?skip=${skip}&limit=${limit}`);
     return response.data;
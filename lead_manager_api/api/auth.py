@@ -7,22 +7,43 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from datetime import datetime, timezone
 from bson import ObjectId
-from typing import Annotated
+from typing import Annotated, Optional
 
 from lead_manager_api.schemas import (
     UserCreate, UserResponse, UserInDB, UserRole,
     Token, MessageResponse
 )
 from lead_manager_api.security import (
-    get_password_hash, verify_password, 
+    get_password_hash_async, verify_password_async,
     create_access_token, decode_access_token
 )
+from lead_manager_api.cache import TTLCache
+from lead_manager_api.config import get_settings
 from lead_manager_api.database import get_users_collection
 
 router = APIRouter(prefix="/auth", tags=["Autenticação"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+_usuarios_cache: Optional[TTLCache] = None
+
+
+def _obter_usuarios_cache() -> TTLCache:
+    """Cache dos usuários autenticados, por (email, token)."""
+    global _usuarios_cache
+    if _usuarios_cache is None:
+        settings = get_settings()
+        _usuarios_cache = TTLCache(
+            ttl=settings.usuarios_cache_ttl_segundos,
+            maxsize=settings.usuarios_cache_max
+        )
+    return _usuarios_cache
+
+
+def invalidar_usuario(email: str) -> None:
+    """Remove do cache todas as entradas do usuário (chamar ao alterar ou desativar)."""
+    _obter_usuarios_cache().invalidar(lambda chave: chave[0] == email)
+
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> UserInDB:
     """Extrai e valida o usuário atual do token JWT."""
@@ -37,13 +58,19 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Use
     if token_data is None or token_data.email is None:
         raise credentials_exception
     
+    cache = _obter_usuarios_cache()
+    chave = (token_data.email, token)
+    user = cache.get(chave)
+    if user is not None:
+        return user
+    
     users_collection = get_users_collection()
-    user_doc = users_collection.find_one({"email": token_data.email})
+    user_doc = await users_collection.find_one({"email": token_data.email})
     
     if user_doc is None:
         raise credentials_exception
     
-    return UserInDB(
+    user = UserInDB(
         id=str(user_doc["_id"]),
         email=user_doc["email"],
         full_name=user_doc["full_name"],
@@ -53,6 +80,9 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Use
         created_at=user_doc["created_at"],
         updated_at=user_doc["updated_at"]
     )
+    cache.set(chave, user)
+    
+    return user
 
 
 async def get_current_active_user(
@@ -89,7 +119,7 @@ async def register(user_data: UserCreate) -> UserResponse:
     """Registra um novo usuário no sistema."""
     users_collection = get_users_collection()
     
-    existing_user = users_collection.find_one({"email": user_data.email})
+    existing_user = await users_collection.find_one({"email": user_data.email})
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -100,14 +130,15 @@ async def register(user_data: UserCreate) -> UserResponse:
     user_doc = {
         "email": user_data.email,
         "full_name": user_data.full_name,
-        "hashed_password": get_password_hash(user_data.password),
+        "hashed_password": await get_password_hash_async(user_data.password),
         "role": user_data.role.value,
         "is_active": True,
         "created_at": now,
         "updated_at": now
     }
     
-    result = users_collection.insert_one(user_doc)
+    result = await users_collection.insert_one(user_doc)
+    invalidar_usuario(user_data.email)
     
     return UserResponse(
         id=str(result.inserted_id),
@@ -128,7 +159,7 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]) -> T
     """Autentica o usuário e retorna um token de acesso."""
     users_collection = get_users_collection()
     
-    user_doc = users_collection.find_one({"email": form_data.username})
+    user_doc = await users_collection.find_one({"email": form_data.username})
     
     if not user_doc:
         raise HTTPException(
@@ -137,7 +168,7 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]) -> T
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not verify_password(form_data.password, user_doc["hashed_password"]):
+    if not await verify_password_async(form_data.password, user_doc["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
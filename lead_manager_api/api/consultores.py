@@ -40,7 +40,7 @@ async def criar_consultor(
     collection = get_consultores_collection()
     
     # Verifica se já existe com mesmo bitrix_id
-    if collection.find_one({"bitrix_id": data.bitrix_id}):
+    if await collection.find_one({"bitrix_id": data.bitrix_id}):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Já existe um consultor com Bitrix ID {data.bitrix_id}"
@@ -57,7 +57,7 @@ async def criar_consultor(
         "updated_at": now
     }
     
-    result = collection.insert_one(doc)
+    result = await collection.insert_one(doc)
     doc["_id"] = result.inserted_id
     
     return doc_to_response(doc)
@@ -76,7 +76,7 @@ async def listar_consultores(
         filtro["ativo"] = True
     
     cursor = collection.find(filtro)
-    return [doc_to_response(doc) for doc in cursor]
+    return [doc_to_response(doc) async for doc in cursor]
 
 
 @router.get("/{consultor_id}", response_model=ConsultorResponse)
@@ -88,7 +88,7 @@ async def obter_consultor(
     collection = get_consultores_collection()
     
     try:
-        doc = collection.find_one({"_id": ObjectId(consultor_id)})
+        doc = await collection.find_one({"_id": ObjectId(consultor_id)})
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
     
@@ -112,7 +112,7 @@ async def atualizar_consultor(
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    existing = collection.find_one({"_id": object_id})
+    existing = await collection.find_one({"_id": object_id})
     if not existing:
         raise HTTPException(status_code=404, detail="Consultor não encontrado")
     
@@ -122,7 +122,7 @@ async def atualizar_consultor(
     
     # Verifica duplicidade de bitrix_id
     if "bitrix_id" in update_data:
-        existe = collection.find_one({
+        existe = await collection.find_one({
             "bitrix_id": update_data["bitrix_id"],
             "_id": {"$ne": object_id}
         })
@@ -130,9 +130,9 @@ async def atualizar_consultor(
             raise HTTPException(status_code=400, detail="Bitrix ID já existe")
     
     update_data["updated_at"] = datetime.now(timezone.utc)
-    collection.update_one({"_id": object_id}, {"$set": update_data})
+    await collection.update_one({"_id": object_id}, {"$set": update_data})
     
-    doc = collection.find_one({"_id": object_id})
+    doc = await collection.find_one({"_id": object_id})
     return doc_to_response(doc)
 
 
@@ -145,7 +145,7 @@ async def deletar_consultor(
     collection = get_consultores_collection()
     
     try:
-        result = collection.delete_one({"_id": ObjectId(consultor_id)})
+        result = await collection.delete_one({"_id": ObjectId(consultor_id)})
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
     
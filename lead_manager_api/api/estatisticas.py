@@ -2,20 +2,208 @@
 Rotas para estatísticas e relatórios com dados reais.
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from datetime import datetime, timezone, timedelta
+from itertools import islice
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from bson import ObjectId
-from typing import Annotated, Optional
+from typing import Annotated, Any, Dict, Iterable, Iterator, Literal, Optional
+from pymongo.asynchronous.collection import AsyncCollection
 
+from lead_manager_api.cache import TTLCache
+from lead_manager_api.config import get_settings
+from lead_manager_api.pagination import paginar
 from lead_manager_api.schemas import UserInDB
 from lead_manager_api.database import (
     get_leads_collection, get_lotes_collection, get_produtos_collection,
     get_consultores_collection, get_disparos_collection, get_estatisticas_consultores_collection
 )
-from lead_manager_api.api.auth import get_current_active_user
+from lead_manager_api.services.estatisticas_service import (
+    DisparoEmAndamentoError, hora_do_envio, reconstruir_estatisticas
+)
+from lead_manager_api.api.auth import get_current_active_user, get_current_admin_user
 
 router = APIRouter(prefix="/estatisticas", tags=["Estatísticas"])
 
+# Perfil de leitura das consultas agregadas (mongodb_read_preferences): por
+# padrão, vão para os secundários e não concorrem com as escritas no primário.
+# As listagens de lotes e disparos leem do primário (sem atraso de replicação)
+LEITURA = "estatisticas"
+
+MAX_PONTOS_SERIE = 2000
+
+# Granularidade da série temporal -> unidade do $dateTrunc
+_UNIDADES = {"hora": "hour", "dia": "day", "semana": "week"}
+
+# Agrupamento da série temporal -> campo do lead
+_CAMPOS_GRUPO = {"produto": "produto_id", "consultor": "consultor_id"}
+
+
+_cache: Optional[TTLCache] = None
+
+
+def _obter_cache() -> TTLCache:
+    """Cache das respostas de estatísticas, compartilhado entre usuários."""
+    global _cache
+    if _cache is None:
+        _cache = TTLCache(ttl=get_settings().estatisticas_cache_ttl_segundos, maxsize=64)
+    return _cache
+
+
+def _contagem(resultado: dict, chave: str) -> int:
+    """Extrai o valor de um sub-pipeline `[{"$count": "n"}]` de um $facet."""
+    itens = resultado.get(chave) or []
+    return itens[0]["n"] if itens else 0
+
+
+async def _envios_agrupados(campo: Optional[str], periodos: Dict[str, datetime]) -> Dict[Any, Dict[str, int]]:
+    """
+    Soma os contadores pré-agregados de envio por `campo` (ou no geral, se None):
+    o total e, para cada item de `periodos`, o total a partir daquela data.
+    """
+    grupo: Dict[str, Any] = {"_id": f"${campo}" if campo else None, "total": {"$sum": "$leads"}}
+    for nome, desde in periodos.items():
+        grupo[nome] = {"$sum": {"$cond": [{"$gte": ["$hora", desde]}, "$leads", 0]}}
+
+    return {
+        doc["_id"]: doc
+        async for doc in await get_estatisticas_consultores_collection(LEITURA).aggregate([{"$group": grupo}])
+    }
+
+
+def _obter_fuso(nome: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(nome)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Fuso horário '{nome}' inválido")
+
+
+def _truncar(momento: datetime, granularidade: str, fuso: ZoneInfo) -> datetime:
+    """Início, no fuso informado, do intervalo que contém `momento` (como o $dateTrunc)."""
+    local = momento.astimezone(fuso)
+    if granularidade == "hora":
+        return local.replace(minute=0, second=0, microsecond=0)
+
+    local = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularidade == "semana":
+        # Semanas começam no domingo, padrão do $dateTrunc
+        local -= timedelta(days=(local.weekday() + 1) % 7)
+    return local
+
+
+def _intervalos(inicio: datetime, fim: datetime, granularidade: str, fuso: ZoneInfo) -> Iterator[datetime]:
+    """Gera o início de cada intervalo entre `inicio` e `fim`, inclusive os vazios."""
+    atual = _truncar(inicio, granularidade, fuso)
+    while atual < fim:
+        yield atual
+        if granularidade == "hora":
+            # Soma em UTC para não pular/repetir horas na troca de horário de verão
+            atual = (atual.astimezone(timezone.utc) + timedelta(hours=1)).astimezone(fuso)
+        else:
+            dias = 7 if granularidade == "semana" else 1
+            atual = atual + timedelta(days=dias)
+
+
+def _em_utc(momento: datetime) -> datetime:
+    """Normaliza datas do Mongo (UTC sem fuso) e datas com fuso para UTC com fuso."""
+    if momento.tzinfo is None:
+        return momento.replace(tzinfo=timezone.utc)
+    return momento.astimezone(timezone.utc)
+
+
+def _inicios_periodos(agora: datetime, fuso: ZoneInfo) -> Dict[str, datetime]:
+    """
+    Início dos períodos "hoje", "semana" (últimos 7 dias) e "mes" (últimos 30
+    dias), contados a partir da meia-noite no fuso das estatísticas, o mesmo
+    dia usado pelo gráfico semanal.
+    """
+    hoje = _truncar(agora, "dia", fuso)
+    return {
+        "hoje": hoje,
+        "semana": hoje - timedelta(days=7),
+        "mes": hoje - timedelta(days=30)
+    }
+
+
+async def _nomes_por_id(collection: AsyncCollection, ids: Iterable[str]) -> Dict[str, str]:
+    """Busca de uma vez o nome dos documentos (produtos, consultores) pelos IDs em string."""
+    object_ids = list({ObjectId(i) for i in ids if i and ObjectId.is_valid(i)})
+    if not object_ids:
+        return {}
+
+    return {
+        str(doc["_id"]): doc.get("nome", "")
+        async for doc in collection.find({"_id": {"$in": object_ids}}, {"nome": 1})
+    }
+
+
+async def _serie_temporal(
+    inicio: datetime,
+    fim: datetime,
+    granularidade: str,
+    fuso: ZoneInfo,
+    agrupar_por: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Conta os leads enviados em [inicio, fim) por intervalo de tempo, em uma
+    única agregação com $dateTrunc sobre os contadores por hora (o início e o
+    fim têm precisão de uma hora). Intervalos sem envios aparecem zerados.
+    """
+    intervalos = list(islice(_intervalos(inicio, fim, granularidade, fuso), MAX_PONTOS_SERIE + 1))
+    if len(intervalos) > MAX_PONTOS_SERIE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Período muito longo para a granularidade '{granularidade}' (máximo de {MAX_PONTOS_SERIE} pontos)"
+        )
+
+    truncamento = {"date": "$hora", "unit": _UNIDADES[granularidade], "timezone": fuso.key}
+    if granularidade == "semana":
+        truncamento["startOfWeek"] = "sunday"
+
+    chave_grupo: Dict[str, Any] = {"inicio": {"$dateTrunc": truncamento}}
+    if agrupar_por:
+        chave_grupo["grupo"] = f"${_CAMPOS_GRUPO[agrupar_por]}"
+
+    contagens: Dict[datetime, Dict[Optional[str], int]] = {}
+    async for doc in await get_estatisticas_consultores_collection(LEITURA).aggregate([
+        {"$match": {"hora": {"$gte": hora_do_envio(inicio), "$lt": fim}}},
+        {"$group": {"_id": chave_grupo, "leads": {"$sum": "$leads"}}}
+    ]):
+        por_grupo = contagens.setdefault(_em_utc(doc["_id"]["inicio"]), {})
+        por_grupo[doc["_id"].get("grupo")] = doc["leads"]
+
+    pontos = []
+    totais_grupos: Dict[Optional[str], int] = {}
+    for intervalo in intervalos:
+        por_grupo = contagens.get(_em_utc(intervalo), {})
+        ponto = {"inicio": intervalo, "leads": sum(por_grupo.values())}
+        if agrupar_por:
+            ponto["grupos"] = por_grupo
+            for grupo, leads in por_grupo.items():
+                totais_grupos[grupo] = totais_grupos.get(grupo, 0) + leads
+        pontos.append(ponto)
+
+    resultado = {
+        "inicio": inicio.astimezone(fuso),
+        "fim": fim.astimezone(fuso),
+        "granularidade": granularidade,
+        "timezone": fuso.key,
+        "total": sum(p["leads"] for p in pontos),
+        "pontos": pontos
+    }
+
+    if agrupar_por:
+        collection = get_produtos_collection(LEITURA) if agrupar_por == "produto" else get_consultores_collection(LEITURA)
+        nomes = await _nomes_por_id(collection, totais_grupos)
+        grupos = [
+            {"id": grupo, "nome": nomes.get(grupo), "total": total}
+            for grupo, total in totais_grupos.items()
+        ]
+        grupos.sort(key=lambda x: x["total"], reverse=True)
+        resultado["grupos"] = grupos
+
+    return resultado
+
 
 @router.get("/dashboard")
 async def dashboard_stats(
@@ -23,58 +211,56 @@ async def dashboard_stats(
 ):
     """
     Retorna estatísticas gerais para o dashboard.
-    Dados REAIS do banco de dados.
+    Dados REAIS do banco de dados, mantidos em cache por alguns segundos.
     """
-    leads_col = get_leads_collection()
-    lotes_col = get_lotes_collection()
-    consultores_col = get_consultores_collection()
-    produtos_col = get_produtos_collection()
-    disparos_col = get_disparos_collection()
+    cache = _obter_cache()
+    resposta = cache.get("dashboard")
+    if resposta is not None:
+        return resposta
     
-    now = datetime.now(timezone.utc)
-    hoje = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    semana_atras = hoje - timedelta(days=7)
-    mes_atras = hoje - timedelta(days=30)
+    leads_col = get_leads_collection(LEITURA)
+    lotes_col = get_lotes_collection(LEITURA)
+    consultores_col = get_consultores_collection(LEITURA)
+    produtos_col = get_produtos_collection(LEITURA)
+    disparos_col = get_disparos_collection(LEITURA)
+    
+    periodos = _inicios_periodos(datetime.now(timezone.utc), _obter_fuso(get_settings().estatisticas_timezone))
     
     # Contagens gerais
-    total_consultores = consultores_col.count_documents({"ativo": True})
-    total_produtos = produtos_col.count_documents({"ativo": True})
-    
-    # Leads por período
-    total_leads_enviados = leads_col.count_documents({"status": "enviado"})
-    leads_hoje = leads_col.count_documents({
-        "status": "enviado",
-        "enviado_em": {"$gte": hoje}
-    })
-    leads_semana = leads_col.count_documents({
-        "status": "enviado",
-        "enviado_em": {"$gte": semana_atras}
-    })
-    leads_mes = leads_col.count_documents({
-        "status": "enviado",
-        "enviado_em": {"$gte": mes_atras}
-    })
+    total_consultores = await consultores_col.count_documents({"ativo": True})
+    total_produtos = await produtos_col.count_documents({"ativo": True})
     
-    # Lotes
-    total_lotes = lotes_col.count_documents({})
-    lotes_processados = lotes_col.count_documents({"status": "processado"})
-    lotes_enviados = disparos_col.count_documents({"status": "concluido"})
+    # Leads enviados por período, a partir dos contadores pré-agregados
+    envios = (await _envios_agrupados(None, periodos)).get(None, {})
     
     # Leads pendentes (processados mas não enviados)
-    leads_pendentes = leads_col.count_documents({"status": "processado"})
+    leads_aguardando_envio = await leads_col.count_documents({"status": "processado"})
     
-    return {
+    # Lotes
+    cursor_lotes = await lotes_col.aggregate([
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            "processados": [{"$match": {"status": "processado"}}, {"$count": "n"}]
+        }}
+    ])
+    lotes = next(iter(await cursor_lotes.to_list()), {})
+    lotes_enviados = await disparos_col.count_documents({"status": "concluido"})
+    
+    resposta = {
         "consultores_ativos": total_consultores,
         "produtos_ativos": total_produtos,
-        "total_leads_enviados": total_leads_enviados,
-        "leads_hoje": leads_hoje,
-        "leads_semana": leads_semana,
-        "leads_mes": leads_mes,
-        "total_lotes": total_lotes,
-        "lotes_pendentes": lotes_processados,
+        "total_leads_enviados": envios.get("total", 0),
+        "leads_hoje": envios.get("hoje", 0),
+        "leads_semana": envios.get("semana", 0),
+        "leads_mes": envios.get("mes", 0),
+        "total_lotes": _contagem(lotes, "total"),
+        "lotes_pendentes": _contagem(lotes, "processados"),
         "lotes_enviados": lotes_enviados,
-        "leads_aguardando_envio": leads_pendentes
+        "leads_aguardando_envio": leads_aguardando_envio
     }
+    cache.set("dashboard", resposta)
+    
+    return resposta
 
 
 @router.get("/por-consultor")
@@ -86,54 +272,21 @@ async def stats_por_consultor(
     Retorna estatísticas de leads por consultor.
     Dados REAIS baseados nos envios realizados.
     """
-    leads_col = get_leads_collection()
-    consultores_col = get_consultores_collection()
-    
-    now = datetime.now(timezone.utc)
-    hoje = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    consultores_col = get_consultores_collection(LEITURA)
     
-    # Define filtro de data
-    filtro_data = {}
-    if periodo == "hoje":
-        filtro_data = {"enviado_em": {"$gte": hoje}}
-    elif periodo == "semana":
-        filtro_data = {"enviado_em": {"$gte": hoje - timedelta(days=7)}}
-    elif periodo == "mes":
-        filtro_data = {"enviado_em": {"$gte": hoje - timedelta(days=30)}}
+    periodos = _inicios_periodos(datetime.now(timezone.utc), _obter_fuso(get_settings().estatisticas_timezone))
     
     # Busca todos os consultores ativos
-    consultores = list(consultores_col.find({"ativo": True}))
+    consultores = await consultores_col.find({"ativo": True}).to_list()
+    
+    # Leads enviados por consultor (total/hoje/semana/mês), a partir dos contadores.
+    # leads_total é sempre o total geral, independente do `periodo`.
+    contagens = await _envios_agrupados("consultor_id", periodos)
     
     resultado = []
     for consultor in consultores:
         consultor_id = str(consultor["_id"])
-        
-        # Conta leads enviados para este consultor
-        filtro_leads = {"status": "enviado", "consultor_id": consultor_id}
-        filtro_leads.update(filtro_data)
-        
-        total_leads = leads_col.count_documents(filtro_leads)
-        
-        # Leads hoje
-        leads_hoje = leads_col.count_documents({
-            "status": "enviado",
-            "consultor_id": consultor_id,
-            "enviado_em": {"$gte": hoje}
-        })
-        
-        # Leads semana
-        leads_semana = leads_col.count_documents({
-            "status": "enviado",
-            "consultor_id": consultor_id,
-            "enviado_em": {"$gte": hoje - timedelta(days=7)}
-        })
-        
-        # Leads mês
-        leads_mes = leads_col.count_documents({
-            "status": "enviado",
-            "consultor_id": consultor_id,
-            "enviado_em": {"$gte": hoje - timedelta(days=30)}
-        })
+        contagem = contagens.get(consultor_id, {})
         
         resultado.append({
             "id": consultor_id,
@@ -141,10 +294,10 @@ async def stats_por_consultor(
             "bitrix_id": consultor["bitrix_id"],
             "hora_inicio": consultor["hora_inicio"],
             "hora_fim": consultor["hora_fim"],
-            "leads_total": total_leads if periodo == "todos" else leads_col.count_documents({"status": "enviado", "consultor_id": consultor_id}),
-            "leads_hoje": leads_hoje,
-            "leads_semana": leads_semana,
-            "leads_mes": leads_mes
+            "leads_total": contagem.get("total", 0),
+            "leads_hoje": contagem.get("hoje", 0),
+            "leads_semana": contagem.get("semana", 0),
+            "leads_mes": contagem.get("mes", 0)
         })
     
     # Ordena por total de leads (maior primeiro)
@@ -161,57 +314,51 @@ async def stats_por_produto(
     Retorna estatísticas de leads por produto.
     Dados REAIS baseados nos lotes e envios.
     """
-    leads_col = get_leads_collection()
-    lotes_col = get_lotes_collection()
-    produtos_col = get_produtos_collection()
-    
-    now = datetime.now(timezone.utc)
-    hoje = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    lotes_col = get_lotes_collection(LEITURA)
+    produtos_col = get_produtos_collection(LEITURA)
+    
+    periodos = _inicios_periodos(datetime.now(timezone.utc), _obter_fuso(get_settings().estatisticas_timezone))
+    
+    produtos = await produtos_col.find({}).to_list()
+    
+    # Conta lotes e pega o último lote de cada produto
+    lotes_por_produto = {
+        doc["_id"]: doc
+        async for doc in await lotes_col.aggregate([
+            {"$sort": {"created_at": -1}},
+            {"$group": {
+                "_id": "$produto_id",
+                "total": {"$sum": 1},
+                "ultimo_nome": {"$first": "$nome_arquivo"},
+                "ultimo_created_at": {"$first": "$created_at"}
+            }}
+        ])
+    }
     
-    produtos = list(produtos_col.find({}))
+    # Leads enviados por produto (total/hoje/semana), a partir dos contadores
+    enviados_por_produto = await _envios_agrupados("produto_id", {
+        "hoje": periodos["hoje"],
+        "semana": periodos["semana"]
+    })
     
     resultado = []
     for produto in produtos:
         produto_id = str(produto["_id"])
-        
-        # Conta lotes deste produto
-        total_lotes = lotes_col.count_documents({"produto_id": produto_id})
-        
-        # Conta leads por status
-        total_enviados = leads_col.count_documents({
-            "produto_id": produto_id,
-            "status": "enviado"
-        })
-        
-        leads_hoje = leads_col.count_documents({
-            "produto_id": produto_id,
-            "status": "enviado",
-            "enviado_em": {"$gte": hoje}
-        })
-        
-        leads_semana = leads_col.count_documents({
-            "produto_id": produto_id,
-            "status": "enviado",
-            "enviado_em": {"$gte": hoje - timedelta(days=7)}
-        })
-        
-        # Último lote
-        ultimo_lote = lotes_col.find_one(
-            {"produto_id": produto_id},
-            sort=[("created_at", -1)]
-        )
+        lotes = lotes_por_produto.get(produto_id, {})
+        enviados = enviados_por_produto.get(produto_id, {})
+        ultimo_lote_data = lotes.get("ultimo_created_at")
         
         resultado.append({
             "id": produto_id,
             "nome": produto["nome"],
             "tipo": produto.get("tipo", ""),
             "ativo": produto.get("ativo", True),
-            "total_lotes": total_lotes,
-            "total_enviados": total_enviados,
-            "leads_hoje": leads_hoje,
-            "leads_semana": leads_semana,
-            "ultimo_lote": ultimo_lote["nome_arquivo"] if ultimo_lote else None,
-            "ultimo_lote_data": ultimo_lote["created_at"].isoformat() if ultimo_lote else None
+            "total_lotes": lotes.get("total", 0),
+            "total_enviados": enviados.get("total", 0),
+            "leads_hoje": enviados.get("hoje", 0),
+            "leads_semana": enviados.get("semana", 0),
+            "ultimo_lote": lotes.get("ultimo_nome"),
+            "ultimo_lote_data": ultimo_lote_data.isoformat() if ultimo_lote_data else None
         })
     
     resultado.sort(key=lambda x: x["total_enviados"], reverse=True)
@@ -219,55 +366,106 @@ async def stats_por_produto(
     return {"produtos": resultado}
 
 
+@router.get("/serie-temporal")
+async def serie_temporal(
+    current_user: Annotated[UserInDB, Depends(get_current_active_user)],
+    inicio: Optional[datetime] = Query(None, description="Início do período (padrão: 7 dias atrás)"),
+    fim: Optional[datetime] = Query(None, description="Fim do período, exclusivo (padrão: agora)"),
+    granularidade: Literal["hora", "dia", "semana"] = Query("dia", description="hora, dia ou semana"),
+    timezone_nome: Optional[str] = Query(
+        None, alias="timezone", description="Fuso horário dos intervalos (padrão: configuração do servidor)"
+    ),
+    agrupar_por: Optional[Literal["produto", "consultor"]] = Query(
+        None, description="Quebra cada intervalo por produto ou consultor"
+    )
+):
+    """
+    Retorna a série temporal de leads enviados, agrupados por hora, dia ou semana
+    no fuso horário informado. Datas sem fuso são interpretadas nesse fuso.
+    """
+    fuso = _obter_fuso(timezone_nome or get_settings().estatisticas_timezone)
+    
+    fim = fim.replace(tzinfo=fim.tzinfo or fuso) if fim else datetime.now(fuso)
+    inicio = inicio.replace(tzinfo=inicio.tzinfo or fuso) if inicio else fim - timedelta(days=7)
+    if inicio >= fim:
+        raise HTTPException(status_code=400, detail="'inicio' deve ser anterior a 'fim'")
+    
+    return await _serie_temporal(inicio, fim, granularidade, fuso, agrupar_por)
+
+
 @router.get("/grafico-semanal")
 async def grafico_semanal(
     current_user: Annotated[UserInDB, Depends(get_current_active_user)]
 ):
     """
-    Retorna dados para gráfico de leads enviados nos últimos 7 dias.
+    Retorna dados para gráfico de leads enviados nos últimos 7 dias,
+    considerando os dias no fuso horário configurado.
     """
-    leads_col = get_leads_collection()
+    cache = _obter_cache()
+    resposta = cache.get("grafico-semanal")
+    if resposta is not None:
+        return resposta
     
-    now = datetime.now(timezone.utc)
-    hoje = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    fuso = _obter_fuso(get_settings().estatisticas_timezone)
+    hoje = _truncar(datetime.now(timezone.utc), "dia", fuso)
+    
+    serie = await _serie_temporal(hoje - timedelta(days=6), hoje + timedelta(days=1), "dia", fuso)
     
     dias = []
-    for i in range(6, -1, -1):
-        dia = hoje - timedelta(days=i)
-        dia_seguinte = dia + timedelta(days=1)
-        
-        count = leads_col.count_documents({
-            "status": "enviado",
-            "enviado_em": {"$gte": dia, "$lt": dia_seguinte}
-        })
-        
+    for ponto in serie["pontos"]:
+        dia = ponto["inicio"]
         dias.append({
             "data": dia.strftime("%Y-%m-%d"),
-            "dia_semana": ["Dom", "Seg", "Ter", "Qua", "Qui", "Sex", "Sáb"][dia.weekday()],
-            "leads": count,
-            "is_hoje": i == 0
+            "dia_semana": ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"][dia.weekday()],
+            "leads": ponto["leads"],
+            "is_hoje": dia == hoje
         })
     
-    total_semana = sum(d["leads"] for d in dias)
+    total_semana = serie["total"]
     media_diaria = round(total_semana / 7, 1)
     
-    return {
+    resposta = {
         "dias": dias,
         "total_semana": total_semana,
         "media_diaria": media_diaria
     }
+    cache.set("grafico-semanal", resposta)
+    return resposta
+
+
+@router.post("/reconstruir")
+async def reconstruir(
+    current_user: Annotated[UserInDB, Depends(get_current_admin_user)]
+):
+    """
+    Recalcula os contadores pré-agregados de envio a partir dos leads.
+    Use após importar dados antigos ou se os contadores divergirem.
+    Retorna 409 enquanto houver disparo em andamento.
+    """
+    try:
+        total = await reconstruir_estatisticas()
+    except DisparoEmAndamentoError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    _obter_cache().invalidar()
+    
+    return {"message": "Estatísticas reconstruídas", "contadores": total}
 
 
 @router.get("/lotes")
 async def listar_lotes(
     current_user: Annotated[UserInDB, Depends(get_current_active_user)],
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (next_cursor)"),
     skip: int = 0,
-    limit: int = 50,
-    status: Optional[str] = None
+    limit: int = Query(50, ge=1, le=500),
+    status: Optional[str] = None,
+    incluir_total: bool = Query(False, description="Conta o total de lotes do filtro")
 ):
     """
-    Lista todos os lotes salvos no banco com informações detalhadas.
+    Lista todos os lotes salvos no banco com informações detalhadas,
+    paginando por cursor.
     """
+    # Listagem operacional: lê do primário para refletir na hora renomeações
+    # e disparos recém-concluídos
     lotes_col = get_lotes_collection()
     produtos_col = get_produtos_collection()
     disparos_col = get_disparos_collection()
@@ -276,22 +474,28 @@ async def listar_lotes(
     if status:
         filtro["status"] = status
     
-    cursor = lotes_col.find(filtro).sort("created_at", -1).skip(skip).limit(limit)
+    lotes, next_cursor = await paginar(lotes_col, filtro, [("created_at", -1), ("_id", -1)], limit, cursor, skip)
+    
+    # Nomes dos produtos e disparos concluídos da página, uma consulta cada
+    nomes_produtos = await _nomes_por_id(produtos_col, (lote["produto_id"] for lote in lotes))
+    disparos_por_lote = {
+        disparo["lote_id"]: disparo
+        async for disparo in disparos_col.find(
+            {"lote_id": {"$in": [lote["_id"] for lote in lotes]}, "status": "concluido"},
+            {"lote_id": 1, "finalizado_em": 1}
+        ).sort("finalizado_em", 1)
+    }
     
     resultado = []
-    for lote in cursor:
-        # Busca nome do produto
-        produto = produtos_col.find_one({"_id": ObjectId(lote["produto_id"])})
-        
-        # Verifica se foi enviado
-        disparo = disparos_col.find_one({"lote_id": lote["_id"], "status": "concluido"})
+    for lote in lotes:
+        disparo = disparos_por_lote.get(lote["_id"])
         
         resultado.append({
             "id": lote["_id"],
             "nome": lote.get("nome", lote.get("nome_arquivo", "Sem nome")),
             "arquivo": lote.get("nome_arquivo", ""),
             "produto_id": lote["produto_id"],
-            "produto_nome": produto["nome"] if produto else "Desconhecido",
+            "produto_nome": nomes_produtos.get(lote["produto_id"], "Desconhecido"),
             "total_registros": lote.get("total_registros", 0),
             "validos": lote.get("registros_validos", 0),
             "duplicados": lote.get("registros_duplicados", 0),
@@ -301,9 +505,9 @@ async def listar_lotes(
             "enviado_em": disparo["finalizado_em"].isoformat() if disparo and disparo.get("finalizado_em") else None
         })
     
-    total = lotes_col.count_documents(filtro)
+    total = await lotes_col.count_documents(filtro) if incluir_total else None
     
-    return {"lotes": resultado, "total": total}
+    return {"lotes": resultado, "next_cursor": next_cursor, "total": total}
 
 
 @router.put("/lotes/{lote_id}/nome")
@@ -317,7 +521,7 @@ async def renomear_lote(
     """
     lotes_col = get_lotes_collection()
     
-    result = lotes_col.update_one(
+    result = await lotes_col.update_one(
         {"_id": lote_id},
         {"$set": {"nome": nome}}
     )
@@ -332,28 +536,40 @@ async def renomear_lote(
 @router.get("/disparos")
 async def listar_disparos(
     current_user: Annotated[UserInDB, Depends(get_current_active_user)],
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (next_cursor)"),
     skip: int = 0,
-    limit: int = 50
+    limit: int = Query(50, ge=1, le=500)
 ):
     """
-    Lista histórico de disparos (envios para Bitrix).
+    Lista histórico de disparos (envios para Bitrix), paginando por cursor.
+    O total é estimado pelos metadados da coleção.
     """
+    # Lê do primário, como a listagem de lotes
     disparos_col = get_disparos_collection()
     produtos_col = get_produtos_collection()
     lotes_col = get_lotes_collection()
     
-    cursor = disparos_col.find().sort("iniciado_em", -1).skip(skip).limit(limit)
+    disparos, next_cursor = await paginar(disparos_col, {}, [("iniciado_em", -1), ("_id", -1)], limit, cursor, skip)
+    
+    # Nomes dos produtos e lotes da página, uma consulta cada
+    nomes_produtos = await _nomes_por_id(produtos_col, (disparo["produto_id"] for disparo in disparos))
+    lotes_por_id = {
+        lote["_id"]: lote
+        async for lote in lotes_col.find(
+            {"_id": {"$in": list({disparo["lote_id"] for disparo in disparos})}},
+            {"nome": 1, "nome_arquivo": 1}
+        )
+    }
     
     resultado = []
-    for disparo in cursor:
-        produto = produtos_col.find_one({"_id": ObjectId(disparo["produto_id"])})
-        lote = lotes_col.find_one({"_id": disparo["lote_id"]})
+    for disparo in disparos:
+        lote = lotes_por_id.get(disparo["lote_id"])
         
         resultado.append({
             "id": disparo["_id"],
             "lote_id": disparo["lote_id"],
             "lote_nome": lote.get("nome", lote.get("nome_arquivo", "")) if lote else "",
-            "produto_nome": produto["nome"] if produto else "Desconhecido",
+            "produto_nome": nomes_produtos.get(disparo["produto_id"], "Desconhecido"),
             "total_leads": disparo.get("total_leads", 0),
             "enviados_sucesso": disparo.get("enviados_sucesso", 0),
             "enviados_erro": disparo.get("enviados_erro", 0),
@@ -362,4 +578,8 @@ async def listar_disparos(
             "finalizado_em": disparo["finalizado_em"].isoformat() if disparo.get("finalizado_em") else None
         })
     
-    return {"disparos": resultado, "total": disparos_col.count_documents({})}
+    return {
+        "disparos": resultado,
+        "next_cursor": next_cursor,
+        "total": await disparos_col.estimated_document_count()
+    }
@@ -3,28 +3,109 @@ Rotas para upload, processamento e envio de leads.
 """
 
 from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timezone
 from bson import ObjectId
 from bson.errors import InvalidId
-from typing import Annotated, List, Optional
+from pymongo import UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
+from typing import Annotated, Any, AsyncIterator, Dict, List, Literal, Optional
+import asyncio
 import uuid
 
 from lead_manager_api.schemas import (
     MessageResponse, UserInDB, StatusLead,
     UploadResponse, ProcessamentoResponse, LoteResumo
 )
+from lead_manager_api.config import get_settings
+from lead_manager_api.pagination import paginar
 from lead_manager_api.database import (
     get_leads_collection, get_lotes_collection, get_produtos_collection,
     get_historico_collection, get_consultores_collection, get_disparos_collection
 )
 from lead_manager_api.api.auth import get_current_admin_user, get_current_active_user
-from lead_manager_api.services.parser_service import (
-    parse_html_xls, extrair_lead_do_registro, aplicar_filtros
+from lead_manager_api.services.ingestao_service import (
+    ingerir_arquivo, ArquivoInvalidoError
+)
+from lead_manager_api.services.bitrix_service import (
+    BitrixService, BitrixNaoConfiguradoError, obter_bitrix_service
+)
+from lead_manager_api.services.exportacao_service import (
+    COLUNAS_LEADS, COLUNAS_HISTORICO, FORMATOS, MAX_LINHAS_XLSX, exportar
+)
+from lead_manager_api.services.disparo_service import (
+    iniciar_disparo, assumir_disparo, novo_owner
 )
-from lead_manager_api.services.bitrix_service import obter_bitrix_service
 
 router = APIRouter(prefix="/leads", tags=["Leads"])
 
+# Campos retornados por padrão na listagem de leads (sem dados_extras)
+CAMPOS_LISTAGEM_LEADS = [
+    "candidato_id", "nome", "celular", "cpf", "curso_nome", "polo", "inscrito_por",
+    "status_mensalidade", "status", "motivo_filtro", "consultor_id", "bitrix_lead_id",
+    "erro_envio", "enviado_em"
+]
+
+
+def _projecao_leads(campos: Optional[str], incluir_extras: bool) -> Dict[str, int]:
+    """Projeção da listagem de leads: os campos pedidos (ou os padrão) e, opcionalmente, dados_extras."""
+    selecionados = [campo.strip() for campo in (campos or "").split(",") if campo.strip()]
+    invalidos = [campo for campo in selecionados if not campo.isidentifier()]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(invalidos)}")
+    if not selecionados:
+        # Projeção vazia faria o MongoDB retornar o documento inteiro
+        selecionados = CAMPOS_LISTAGEM_LEADS
+    
+    projecao = {campo: 1 for campo in selecionados}
+    if incluir_extras:
+        projecao["dados_extras"] = 1
+    return projecao
+
+
+def _motivo_filtro(
+    lead: Dict[str, Any],
+    status_remover: List[str],
+    valores_permitidos: List[str],
+    modo: str
+) -> Optional[str]:
+    """Retorna o motivo pelo qual o lead deve ser filtrado, ou None se passou."""
+    # Filtro de status (mensalidade)
+    status_mens = lead.get("status_mensalidade", "").upper()
+    if any(s in status_mens for s in status_remover):
+        return f"Status removido: {status_mens}"
+    
+    # Filtro de "Inscrito Por"
+    inscrito_por = lead.get("inscrito_por", "")
+    if modo == "whitelist":
+        passou_filtro = any(v.upper() in inscrito_por.upper() for v in valores_permitidos)
+    else:
+        passou_filtro = not any(v.upper() in inscrito_por.upper() for v in valores_permitidos)
+    
+    if not passou_filtro:
+        return f"Inscrito por não permitido: {inscrito_por}"
+    
+    return None
+
+
+def _resposta_exportacao(conteudo: AsyncIterator[bytes], formato: str, nome: str) -> StreamingResponse:
+    """Resposta em streaming com o arquivo exportado para download."""
+    media_type, extensao = FORMATOS[formato]
+    return StreamingResponse(
+        conteudo,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nome}.{extensao}"'}
+    )
+
+
+async def _conferir_limite_xlsx(collection: AsyncCollection, filtro: Dict[str, Any]) -> None:
+    """Recusa de início a exportação XLSX que passaria do limite de linhas do Excel."""
+    if await collection.count_documents(filtro, limit=MAX_LINHAS_XLSX + 1) > MAX_LINHAS_XLSX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A exportação tem mais de {MAX_LINHAS_XLSX} linhas, o limite do XLSX; use o formato csv ou ndjson"
+        )
+
 
 @router.post("/upload/{produto_id}", response_model=UploadResponse)
 async def upload_arquivo(
@@ -42,84 +123,75 @@ async def upload_arquivo(
     
     # Valida produto
     try:
-        produto = produtos.find_one({"_id": ObjectId(produto_id)})
+        produto = await produtos.find_one({"_id": ObjectId(produto_id)})
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID de produto inválido")
     
     if not produto:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     
-    # Lê o arquivo
-    conteudo = await arquivo.read()
-    
-    try:
-        registros = parse_html_xls(conteudo)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao processar arquivo: {str(e)}")
-    
-    if not registros:
-        raise HTTPException(status_code=400, detail="Arquivo não contém registros válidos")
+    settings = get_settings()
     
     # Extrai mapeamento de colunas do produto
     mapeamento = produto.get("mapeamento_colunas", {})
     
-    # Cria o lote
     lote_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc)
     
-    lote_doc = {
-        "_id": lote_id,
-        "produto_id": produto_id,
-        "nome_arquivo": arquivo.filename,
-        "total_registros": len(registros),
-        "registros_validos": 0,
-        "registros_duplicados": 0,
-        "registros_filtrados": 0,
-        "status": "aguardando_processamento",
-        "created_at": now,
-        "created_by": current_user.id
-    }
-    lotes.insert_one(lote_doc)
+    # O tamanho já foi limitado pelo middleware LimiteTamanhoUpload (main.py).
+    # O arquivo está em um SpooledTemporaryFile: lê direto do handle
+    await arquivo.seek(0)
     
-    # Extrai e salva os leads
-    leads_inseridos = []
-    for registro in registros:
-        lead_data = extrair_lead_do_registro(registro, mapeamento)
+    # Parsing, extração e inserção em streaming. O lote só é gravado depois dos
+    # leads: em qualquer falha (inclusive cancelamento) os leads já inseridos
+    # são removidos, para não ficarem órfãos
+    concluido = False
+    try:
+        try:
+            resultado = await ingerir_arquivo(
+                arquivo.file,
+                leads_col,
+                lote_id=lote_id,
+                produto_id=produto_id,
+                mapeamento=mapeamento,
+                created_at=now,
+                engine=settings.parser_engine,
+                tamanho_lote=settings.upload_batch_size
+            )
+        except ArquivoInvalidoError as e:
+            raise HTTPException(status_code=400, detail=f"Erro ao processar arquivo: {str(e)}")
         
-        # Valida dados mínimos
-        if not lead_data.get("candidato_id") or not lead_data.get("nome"):
-            continue
+        if not resultado["total_registros"]:
+            raise HTTPException(status_code=400, detail="Arquivo não contém registros válidos")
+        
+        total_inseridos = resultado["total_inseridos"]
         
-        lead_doc = {
-            "lote_id": lote_id,
+        # Cria o lote com o total efetivamente inserido
+        lote_doc = {
+            "_id": lote_id,
             "produto_id": produto_id,
-            "candidato_id": lead_data["candidato_id"],
-            "nome": lead_data["nome"],
-            "celular": lead_data.get("celular", ""),
-            "cpf": lead_data.get("cpf", ""),
-            "curso_codigo": lead_data.get("curso_codigo", ""),
-            "curso_nome": lead_data.get("curso_nome", ""),
-            "polo": lead_data.get("polo", ""),
-            "inscrito_por": lead_data.get("inscrito_por", ""),
-            "status_mensalidade": lead_data.get("status_mensalidade", ""),
-            "dados_extras": lead_data.get("dados_extras", {}),
-            "status": StatusLead.PENDENTE.value,
-            "motivo_filtro": None,
-            "created_at": now
+            "nome_arquivo": arquivo.filename,
+            "total_registros": total_inseridos,
+            "registros_validos": 0,
+            "registros_duplicados": 0,
+            "registros_filtrados": 0,
+            "status": "aguardando_processamento",
+            "created_at": now,
+            "created_by": current_user.id
         }
-        
-        leads_col.insert_one(lead_doc)
-        leads_inseridos.append(lead_data)
-    
-    # Preview dos primeiros 10 registros
-    preview = leads_inseridos[:10]
+        await lotes.insert_one(lote_doc)
+        concluido = True
+    finally:
+        if not concluido:
+            # shield: a limpeza termina mesmo se a requisição for cancelada de novo
+            await asyncio.shield(leads_col.delete_many({"lote_id": lote_id}))
     
     return UploadResponse(
-        message=f"Upload realizado com sucesso! {len(leads_inseridos)} registros carregados.",
+        message=f"Upload realizado com sucesso! {total_inseridos} registros carregados.",
         lote_id=lote_id,
         arquivo=arquivo.filename,
-        total_registros=len(leads_inseridos),
-        preview=preview
+        total_registros=total_inseridos,
+        preview=resultado["preview"]
     )
 
 
@@ -137,90 +209,72 @@ async def processar_lote(
     historico = get_historico_collection()
     
     # Busca o lote
-    lote = lotes.find_one({"_id": lote_id})
+    lote = await lotes.find_one({"_id": lote_id})
     if not lote:
         raise HTTPException(status_code=404, detail="Lote não encontrado")
     
     # Busca o produto para pegar os filtros
-    produto = produtos.find_one({"_id": ObjectId(lote["produto_id"])})
+    produto = await produtos.find_one({"_id": ObjectId(lote["produto_id"])})
     if not produto:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     
     filtro_inscrito_por = produto.get("filtro_inscrito_por", {"valores_permitidos": ["6111 DIGITAL"], "modo": "whitelist"})
     filtro_status = produto.get("filtro_status", {"remover": ["PAGO"]})
     
-    # Busca leads pendentes do lote
-    leads_pendentes = list(leads_col.find({
-        "lote_id": lote_id,
-        "status": StatusLead.PENDENTE.value
-    }))
+    status_remover = [s.upper() for s in filtro_status.get("remover", ["PAGO"])]
+    valores_permitidos = filtro_inscrito_por.get("valores_permitidos", ["6111 DIGITAL"])
+    modo = filtro_inscrito_por.get("modo", "whitelist")
+    
+    # Busca leads pendentes do lote (apenas os campos usados nos filtros)
+    cursor = leads_col.find(
+        {"lote_id": lote_id, "status": StatusLead.PENDENTE.value},
+        {"candidato_id": 1, "status_mensalidade": 1, "inscrito_por": 1}
+    )
     
-    total = len(leads_pendentes)
+    total = 0
     duplicados = 0
     filtrados = 0
     validos = 0
     
-    for lead in leads_pendentes:
-        candidato_id = lead["candidato_id"]
+    tamanho_chunk = get_settings().processamento_chunk_size
+    while chunk := await cursor.to_list(tamanho_chunk):
+        total += len(chunk)
         
-        # 1. Verifica duplicado no histórico
-        if historico.find_one({"candidato_id": candidato_id}):
-            leads_col.update_one(
-                {"_id": lead["_id"]},
-                {"$set": {
-                    "status": StatusLead.DUPLICADO.value,
-                    "motivo_filtro": "Já enviado anteriormente"
-                }}
+        # 1. Verifica duplicados no histórico com uma única consulta por chunk
+        candidatos = list({lead["candidato_id"] for lead in chunk})
+        ja_enviados = {
+            doc["candidato_id"]
+            async for doc in historico.find(
+                {"candidato_id": {"$in": candidatos}},
+                {"candidato_id": 1, "_id": 0}
             )
-            duplicados += 1
-            continue
-        
-        # 2. Aplica filtro de status (mensalidade)
-        status_mens = lead.get("status_mensalidade", "").upper()
-        status_remover = [s.upper() for s in filtro_status.get("remover", ["PAGO"])]
-        
-        if any(s in status_mens for s in status_remover):
-            leads_col.update_one(
-                {"_id": lead["_id"]},
-                {"$set": {
-                    "status": StatusLead.FILTRADO.value,
-                    "motivo_filtro": f"Status removido: {status_mens}"
-                }}
-            )
-            filtrados += 1
-            continue
-        
-        # 3. Aplica filtro de "Inscrito Por"
-        inscrito_por = lead.get("inscrito_por", "")
-        valores_permitidos = filtro_inscrito_por.get("valores_permitidos", ["6111 DIGITAL"])
-        modo = filtro_inscrito_por.get("modo", "whitelist")
-        
-        passou_filtro = False
-        if modo == "whitelist":
-            passou_filtro = any(v.upper() in inscrito_por.upper() for v in valores_permitidos)
-        else:
-            passou_filtro = not any(v.upper() in inscrito_por.upper() for v in valores_permitidos)
+        }
         
-        if not passou_filtro:
-            leads_col.update_one(
-                {"_id": lead["_id"]},
-                {"$set": {
-                    "status": StatusLead.FILTRADO.value,
-                    "motivo_filtro": f"Inscrito por não permitido: {inscrito_por}"
-                }}
-            )
-            filtrados += 1
-            continue
+        operacoes = []
+        for lead in chunk:
+            if lead["candidato_id"] in ja_enviados:
+                novo_status = StatusLead.DUPLICADO.value
+                motivo = "Já enviado anteriormente"
+                duplicados += 1
+            else:
+                motivo = _motivo_filtro(lead, status_remover, valores_permitidos, modo)
+                if motivo:
+                    novo_status = StatusLead.FILTRADO.value
+                    filtrados += 1
+                else:
+                    novo_status = StatusLead.PROCESSADO.value
+                    validos += 1
+            
+            alteracoes = {"status": novo_status}
+            if motivo:
+                alteracoes["motivo_filtro"] = motivo
+            operacoes.append(UpdateOne({"_id": lead["_id"]}, {"$set": alteracoes}))
         
-        # Lead válido!
-        leads_col.update_one(
-            {"_id": lead["_id"]},
-            {"$set": {"status": StatusLead.PROCESSADO.value}}
-        )
-        validos += 1
+        if operacoes:
+            await leads_col.bulk_write(operacoes, ordered=False)
     
     # Atualiza o lote
-    lotes.update_one(
+    await lotes.update_one(
         {"_id": lote_id},
         {"$set": {
             "status": "processado",
@@ -254,11 +308,11 @@ async def resumo_lote(
     leads_col = get_leads_collection()
     produtos = get_produtos_collection()
     
-    lote = lotes.find_one({"_id": lote_id})
+    lote = await lotes.find_one({"_id": lote_id})
     if not lote:
         raise HTTPException(status_code=404, detail="Lote não encontrado")
     
-    produto = produtos.find_one({"_id": ObjectId(lote["produto_id"])})
+    produto = await produtos.find_one({"_id": ObjectId(lote["produto_id"])})
     produto_nome = produto["nome"] if produto else "Desconhecido"
     
     # Conta por status
@@ -267,7 +321,7 @@ async def resumo_lote(
         {"$group": {"_id": "$status", "count": {"$sum": 1}}}
     ]
     
-    contagem = {item["_id"]: item["count"] for item in leads_col.aggregate(pipeline)}
+    contagem = {item["_id"]: item["count"] async for item in await leads_col.aggregate(pipeline)}
     
     return LoteResumo(
         lote_id=lote_id,
@@ -287,27 +341,72 @@ async def listar_leads_lote(
     lote_id: str,
     current_user: Annotated[UserInDB, Depends(get_current_active_user)],
     status_filtro: Optional[str] = Query(None, description="Filtrar por status"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (next_cursor)"),
     skip: int = 0,
-    limit: int = 100
+    limit: int = Query(100, ge=1, le=1000),
+    incluir_total: bool = Query(False, description="Conta o total de leads do filtro"),
+    campos: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula"),
+    incluir_extras: bool = Query(False, description="Inclui dados_extras (todas as colunas do arquivo)")
 ):
-    """Lista leads de um lote."""
+    """
+    Lista leads de um lote, paginando por cursor.
+    Por padrão retorna só os campos usados na listagem, sem dados_extras.
+    """
     leads_col = get_leads_collection()
     
     filtro = {"lote_id": lote_id}
     if status_filtro:
         filtro["status"] = status_filtro
     
-    cursor = leads_col.find(filtro).skip(skip).limit(limit)
+    projecao = _projecao_leads(campos, incluir_extras)
+    docs, next_cursor = await paginar(leads_col, filtro, [("_id", 1)], limit, cursor, skip, projecao)
     
     leads = []
-    for doc in cursor:
+    for doc in docs:
         doc["_id"] = str(doc["_id"])
         leads.append(doc)
     
-    return {"leads": leads, "total": leads_col.count_documents(filtro)}
+    return {
+        "leads": leads,
+        "next_cursor": next_cursor,
+        "total": await leads_col.count_documents(filtro) if incluir_total else None
+    }
+
+
+@router.get("/lote/{lote_id}/exportar")
+async def exportar_leads_lote(
+    lote_id: str,
+    current_user: Annotated[UserInDB, Depends(get_current_active_user)],
+    formato: Literal["ndjson", "csv", "xlsx"] = Query("csv", description="ndjson, csv ou xlsx"),
+    status_filtro: Optional[str] = Query(None, description="Filtrar por status")
+):
+    """Exporta os leads de um lote, gerando o arquivo enquanto lê o banco."""
+    if not await get_lotes_collection().find_one({"_id": lote_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Lote não encontrado")
+    
+    filtro = {"lote_id": lote_id}
+    if status_filtro:
+        filtro["status"] = status_filtro
+    
+    leads_col = get_leads_collection()
+    if formato == "xlsx":
+        await _conferir_limite_xlsx(leads_col, filtro)
+    
+    projecao = None if formato == "ndjson" else {coluna: 1 for coluna in COLUNAS_LEADS}
+    docs = leads_col.find(filtro, projecao).sort("_id", 1).batch_size(1000)
+    
+    return _resposta_exportacao(exportar(docs, COLUNAS_LEADS, formato), formato, f"leads_{lote_id}")
+
+
+def _obter_bitrix() -> BitrixService:
+    """Serviço do Bitrix24, ou 503 se o webhook não estiver configurado."""
+    try:
+        return obter_bitrix_service()
+    except BitrixNaoConfiguradoError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
 
 
-@router.post("/enviar/{lote_id}")
+@router.post("/enviar/{lote_id}", status_code=status.HTTP_202_ACCEPTED)
 async def enviar_para_bitrix(
     lote_id: str,
     current_user: Annotated[UserInDB, Depends(get_current_admin_user)]
@@ -315,20 +414,21 @@ async def enviar_para_bitrix(
     """
     Envia os leads processados de um lote para o Bitrix24.
     Distribui entre os consultores do produto usando round-robin.
+    O envio roda em background: acompanhe por /leads/disparos/{disparo_id}/progresso.
     """
+    bitrix = _obter_bitrix()
     lotes = get_lotes_collection()
     leads_col = get_leads_collection()
     produtos = get_produtos_collection()
     consultores_col = get_consultores_collection()
-    historico = get_historico_collection()
     disparos = get_disparos_collection()
     
     # Busca lote e produto
-    lote = lotes.find_one({"_id": lote_id})
+    lote = await lotes.find_one({"_id": lote_id})
     if not lote:
         raise HTTPException(status_code=404, detail="Lote não encontrado")
     
-    produto = produtos.find_one({"_id": ObjectId(lote["produto_id"])})
+    produto = await produtos.find_one({"_id": ObjectId(lote["produto_id"])})
     if not produto:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     
@@ -339,7 +439,7 @@ async def enviar_para_bitrix(
     consultores_disponiveis = []
     for cid in consultores_ids:
         try:
-            consultor = consultores_col.find_one({"_id": ObjectId(cid), "ativo": True})
+            consultor = await consultores_col.find_one({"_id": ObjectId(cid), "ativo": True})
             if consultor:
                 if consultor["hora_inicio"] <= hora_atual < consultor["hora_fim"]:
                     consultores_disponiveis.append(consultor)
@@ -352,126 +452,150 @@ async def enviar_para_bitrix(
             detail="Nenhum consultor disponível no horário atual"
         )
     
-    # Busca leads processados
-    leads_para_enviar = list(leads_col.find({
+    # Conta leads processados (são reivindicados um grupo por vez no envio)
+    total_leads = await leads_col.count_documents({
         "lote_id": lote_id,
         "status": StatusLead.PROCESSADO.value
-    }))
+    })
     
-    if not leads_para_enviar:
+    if not total_leads:
         raise HTTPException(status_code=400, detail="Nenhum lead para enviar")
     
     # Cria registro de disparo
     disparo_id = str(uuid.uuid4())
+    owner = novo_owner()
     now = datetime.now(timezone.utc)
     
     disparo_doc = {
         "_id": disparo_id,
         "lote_id": lote_id,
         "produto_id": lote["produto_id"],
-        "total_leads": len(leads_para_enviar),
+        "consultores_ids": [str(c["_id"]) for c in consultores_disponiveis],
+        "total_leads": total_leads,
         "enviados_sucesso": 0,
         "enviados_erro": 0,
+        "sequencia": 0,
+        "owner": owner,
+        "heartbeat_em": now,
         "iniciado_em": now,
         "finalizado_em": None,
         "status": "em_andamento"
     }
-    disparos.insert_one(disparo_doc)
+    await disparos.insert_one(disparo_doc)
+    
+    # Envia para Bitrix em background
+    iniciar_disparo(disparo_id, owner, bitrix)
     
-    # Envia para Bitrix
-    bitrix = obter_bitrix_service()
-    company_title = produto.get("bitrix_company_title", "Unicesumar")
+    return {
+        "message": "Envio iniciado!",
+        "disparo_id": disparo_id,
+        "status": "em_andamento",
+        "total": total_leads,
+        "consultores_utilizados": [c["nome"] for c in consultores_disponiveis]
+    }
+
+
+@router.post("/disparos/{disparo_id}/retomar", status_code=status.HTTP_202_ACCEPTED)
+async def retomar_disparo(
+    disparo_id: str,
+    current_user: Annotated[UserInDB, Depends(get_current_admin_user)]
+):
+    """
+    Retoma um disparo interrompido (instância caiu ou terminou com erro).
+    Leads já confirmados não são reenviados; os que ficaram "enviando" são
+    conferidos no Bitrix24 antes de um novo envio.
+    """
+    bitrix = _obter_bitrix()
+    disparos = get_disparos_collection()
     
-    enviados_sucesso = 0
-    enviados_erro = 0
-    consultor_index = 0
+    if not await disparos.find_one({"_id": disparo_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Disparo não encontrado")
     
-    for lead in leads_para_enviar:
-        # Round-robin entre consultores
-        consultor = consultores_disponiveis[consultor_index % len(consultores_disponiveis)]
-        consultor_index += 1
-        
-        resultado = await bitrix.criar_lead(
-            nome=lead["nome"],
-            telefone=lead["celular"],
-            consultor_bitrix_id=consultor["bitrix_id"],
-            company_title=company_title,
-            cpf=lead.get("cpf"),
-            curso=lead.get("curso_nome") or lead.get("curso_codigo"),
-            polo=lead.get("polo"),
-            candidato_id=lead.get("candidato_id"),
-            base=produto["nome"]
+    owner = await assumir_disparo(disparo_id)
+    if not owner:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Disparo não pode ser retomado: já concluído ou ainda em execução"
         )
-        
-        if resultado["sucesso"]:
-            # Atualiza lead como enviado
-            leads_col.update_one(
-                {"_id": lead["_id"]},
-                {"$set": {
-                    "status": StatusLead.ENVIADO.value,
-                    "bitrix_lead_id": str(resultado.get("lead_id")),
-                    "consultor_id": str(consultor["_id"]),
-                    "enviado_em": datetime.now(timezone.utc)
-                }}
-            )
-            
-            # Adiciona ao histórico para evitar duplicados futuros
-            try:
-                historico.insert_one({
-                    "candidato_id": lead["candidato_id"],
-                    "produto_id": lote["produto_id"],
-                    "enviado_em": datetime.now(timezone.utc),
-                    "lote_id": lote_id
-                })
-            except:
-                pass  # Ignora se já existe
-            
-            enviados_sucesso += 1
-        else:
-            leads_col.update_one(
-                {"_id": lead["_id"]},
-                {"$set": {
-                    "status": StatusLead.ERRO.value,
-                    "erro_envio": resultado.get("erro", "Erro desconhecido")
-                }}
-            )
-            enviados_erro += 1
     
-    # Finaliza disparo
-    disparos.update_one(
+    iniciar_disparo(disparo_id, owner, bitrix)
+    
+    return {"message": "Disparo retomado!", "disparo_id": disparo_id, "status": "em_andamento"}
+
+
+@router.get("/disparos/{disparo_id}/progresso")
+async def progresso_disparo(
+    disparo_id: str,
+    current_user: Annotated[UserInDB, Depends(get_current_active_user)]
+):
+    """Retorna o progresso de um disparo em andamento ou finalizado."""
+    disparos = get_disparos_collection()
+    
+    disparo = await disparos.find_one(
         {"_id": disparo_id},
-        {"$set": {
-            "enviados_sucesso": enviados_sucesso,
-            "enviados_erro": enviados_erro,
-            "finalizado_em": datetime.now(timezone.utc),
-            "status": "concluido"
-        }}
+        {
+            "lote_id": 1, "status": 1, "total_leads": 1,
+            "enviados_sucesso": 1, "enviados_erro": 1,
+            "iniciado_em": 1, "finalizado_em": 1, "erro": 1
+        }
     )
+    if not disparo:
+        raise HTTPException(status_code=404, detail="Disparo não encontrado")
+    
+    total = disparo.get("total_leads", 0)
+    concluidos = disparo.get("enviados_sucesso", 0) + disparo.get("enviados_erro", 0)
     
     return {
-        "message": "Envio concluído!",
         "disparo_id": disparo_id,
-        "total": len(leads_para_enviar),
-        "enviados_sucesso": enviados_sucesso,
-        "enviados_erro": enviados_erro,
-        "consultores_utilizados": [c["nome"] for c in consultores_disponiveis]
+        "lote_id": disparo["lote_id"],
+        "status": disparo["status"],
+        "total_leads": total,
+        "enviados_sucesso": disparo.get("enviados_sucesso", 0),
+        "enviados_erro": disparo.get("enviados_erro", 0),
+        "percentual": round(concluidos * 100 / total, 1) if total else 100.0,
+        "erro": disparo.get("erro"),
+        "iniciado_em": disparo["iniciado_em"].isoformat() if disparo.get("iniciado_em") else None,
+        "finalizado_em": disparo["finalizado_em"].isoformat() if disparo.get("finalizado_em") else None
     }
 
 
+@router.get("/historico/exportar")
+async def exportar_historico(
+    current_user: Annotated[UserInDB, Depends(get_current_active_user)],
+    formato: Literal["ndjson", "csv", "xlsx"] = Query("csv", description="ndjson, csv ou xlsx")
+):
+    """Exporta o histórico de candidatos já enviados, do mais recente ao mais antigo."""
+    historico_col = get_historico_collection()
+    if formato == "xlsx":
+        await _conferir_limite_xlsx(historico_col, {})
+    
+    docs = historico_col.find().sort([("enviado_em", -1), ("_id", -1)]).batch_size(1000)
+    
+    return _resposta_exportacao(exportar(docs, COLUNAS_HISTORICO, formato), formato, "historico")
+
+
 @router.get("/historico")
 async def listar_historico(
     current_user: Annotated[UserInDB, Depends(get_current_active_user)],
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (next_cursor)"),
     skip: int = 0,
-    limit: int = 100
+    limit: int = Query(100, ge=1, le=1000)
 ):
-    """Lista histórico de candidatos já enviados."""
+    """
+    Lista histórico de candidatos já enviados, paginando por cursor.
+    O total é estimado pelos metadados da coleção.
+    """
     historico = get_historico_collection()
     
-    cursor = historico.find().sort("enviado_em", -1).skip(skip).limit(limit)
+    docs, next_cursor = await paginar(historico, {}, [("enviado_em", -1), ("_id", -1)], limit, cursor, skip)
     
     items = []
-    for doc in cursor:
+    for doc in docs:
         doc["_id"] = str(doc["_id"])
         items.append(doc)
     
-    return {"historico": items, "total": historico.count_documents({})}
\ No newline at end of file
+    return {
+        "historico": items,
+        "next_cursor": next_cursor,
+        "total": await historico.estimated_document_count()
+    }
\ No newline at end of file
@@ -44,7 +44,7 @@ async def criar_produto(
     collection = get_produtos_collection()
     
     # Verifica se já existe com mesmo nome
-    if collection.find_one({"nome": data.nome}):
+    if await collection.find_one({"nome": data.nome}):
         raise HTTPException(status_code=400, detail=f"Produto '{data.nome}' já existe")
     
     now = datetime.now(timezone.utc)
@@ -62,7 +62,7 @@ async def criar_produto(
         "updated_at": now
     }
     
-    result = collection.insert_one(doc)
+    result = await collection.insert_one(doc)
     doc["_id"] = result.inserted_id
     
     return doc_to_response(doc)
@@ -81,7 +81,7 @@ async def listar_produtos(
         filtro["ativo"] = True
     
     cursor = collection.find(filtro)
-    return [doc_to_response(doc) for doc in cursor]
+    return [doc_to_response(doc) async for doc in cursor]
 
 
 @router.get("/{produto_id}", response_model=ProdutoResponse)
@@ -93,7 +93,7 @@ async def obter_produto(
     collection = get_produtos_collection()
     
     try:
-        doc = collection.find_one({"_id": ObjectId(produto_id)})
+        doc = await collection.find_one({"_id": ObjectId(produto_id)})
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
     
@@ -117,7 +117,7 @@ async def atualizar_produto(
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    existing = collection.find_one({"_id": object_id})
+    existing = await collection.find_one({"_id": object_id})
     if not existing:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     
@@ -136,9 +136,9 @@ async def atualizar_produto(
         raise HTTPException(status_code=400, detail="Nenhum campo para atualizar")
     
     update_data["updated_at"] = datetime.now(timezone.utc)
-    collection.update_one({"_id": object_id}, {"$set": update_data})
+    await collection.update_one({"_id": object_id}, {"$set": update_data})
     
-    doc = collection.find_one({"_id": object_id})
+    doc = await collection.find_one({"_id": object_id})
     return doc_to_response(doc)
 
 
@@ -151,7 +151,7 @@ async def deletar_produto(
     collection = get_produtos_collection()
     
     try:
-        result = collection.delete_one({"_id": ObjectId(produto_id)})
+        result = await collection.delete_one({"_id": ObjectId(produto_id)})
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
     
@@ -177,23 +177,23 @@ async def adicionar_consultor_ao_produto(
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    produto = produtos.find_one({"_id": prod_oid})
+    produto = await produtos.find_one({"_id": prod_oid})
     if not produto:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     
-    consultor = consultores.find_one({"_id": cons_oid})
+    consultor = await consultores.find_one({"_id": cons_oid})
     if not consultor:
         raise HTTPException(status_code=404, detail="Consultor não encontrado")
     
     consultores_ids = produto.get("consultores_ids", [])
     if consultor_id not in consultores_ids:
         consultores_ids.append(consultor_id)
-        produtos.update_one(
+        await produtos.update_one(
             {"_id": prod_oid},
             {"$set": {"consultores_ids": consultores_ids, "updated_at": datetime.now(timezone.utc)}}
         )
     
-    doc = produtos.find_one({"_id": prod_oid})
+    doc = await produtos.find_one({"_id": prod_oid})
     return doc_to_response(doc)
 
 
@@ -211,17 +211,17 @@ async def remover_consultor_do_produto(
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
     
-    produto = produtos.find_one({"_id": prod_oid})
+    produto = await produtos.find_one({"_id": prod_oid})
     if not produto:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     
     consultores_ids = produto.get("consultores_ids", [])
     if consultor_id in consultores_ids:
         consultores_ids.remove(consultor_id)
-        produtos.update_one(
+        await produtos.update_one(
             {"_id": prod_oid},
             {"$set": {"consultores_ids": consultores_ids, "updated_at": datetime.now(timezone.utc)}}
         )
     
-    doc = produtos.find_one({"_id": prod_oid})
+    doc = await produtos.find_one({"_id": prod_oid})
     return doc_to_response(doc)
\ No newline at end of file
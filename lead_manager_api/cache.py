@@ -0,0 +1,55 @@
+"""
+Cache em memória do processo, com expiração por tempo (TTL) e limite de
+tamanho (os itens menos usados recentemente são descartados primeiro).
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """Cache LRU limitado cujos itens expiram após `ttl` segundos."""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        """
+        Args:
+            ttl: Tempo de vida de cada item em segundos (0 desabilita o cache)
+            maxsize: Quantidade máxima de itens mantidos
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._itens: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, chave: Hashable, default: Any = None) -> Any:
+        """Retorna o valor em cache, ou `default` se ausente ou expirado."""
+        item = self._itens.get(chave)
+        if item is None:
+            return default
+
+        expira_em, valor = item
+        if expira_em <= time.monotonic():
+            del self._itens[chave]
+            return default
+
+        self._itens.move_to_end(chave)
+        return valor
+
+    def set(self, chave: Hashable, valor: Any) -> None:
+        """Guarda um valor no cache."""
+        if self.ttl <= 0:
+            return
+
+        self._itens[chave] = (time.monotonic() + self.ttl, valor)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.maxsize:
+            self._itens.popitem(last=False)
+
+    def invalidar(self, predicado: Optional[Callable[[Hashable], bool]] = None) -> None:
+        """Remove todos os itens, ou apenas aqueles cuja chave satisfaz `predicado`."""
+        if predicado is None:
+            self._itens.clear()
+            return
+
+        for chave in [c for c in self._itens if predicado(c)]:
+            del self._itens[chave]
@@ -4,8 +4,9 @@ Carrega e valida todas as variáveis de ambiente necessárias.
 """
 
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import Field, field_validator
 from functools import lru_cache
+from typing import Dict, Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -22,6 +23,61 @@ class Settings(BaseSettings):
         default="lead_manager_db",
         description="Nome do banco de dados"
     )
+    mongodb_max_pool_size: int = Field(
+        default=100,
+        ge=1,
+        description="Máximo de conexões no pool do MongoDB (por processo)"
+    )
+    mongodb_min_pool_size: int = Field(
+        default=0,
+        ge=0,
+        description="Conexões mantidas abertas no pool mesmo sem uso"
+    )
+    mongodb_max_idle_time_ms: int = Field(
+        default=60000,
+        ge=0,
+        description="Tempo (ms) que uma conexão ociosa fica no pool antes de ser fechada (0 = sem limite)"
+    )
+    mongodb_server_selection_timeout_ms: int = Field(
+        default=5000,
+        ge=1,
+        description="Tempo máximo (ms) para encontrar um servidor disponível para a operação"
+    )
+    mongodb_connect_timeout_ms: int = Field(
+        default=10000,
+        ge=1,
+        description="Timeout (ms) para abrir uma conexão com o MongoDB"
+    )
+    mongodb_socket_timeout_ms: int = Field(
+        default=0,
+        ge=0,
+        description="Timeout (ms) de leitura/escrita no socket de uma operação (0 = sem limite)"
+    )
+    mongodb_compressores: str = Field(
+        default="zstd,zlib",
+        description="Compressores do protocolo, em ordem de preferência (zstd, snappy, zlib). "
+                    "Os indisponíveis no servidor ou sem o módulo Python são ignorados"
+    )
+    mongodb_read_preferences: Dict[str, str] = Field(
+        default={"estatisticas": "secondaryPreferred"},
+        description="Preferência de leitura por perfil (ex.: 'estatisticas') ou por coleção (ex.: 'leads'); "
+                    "o que não estiver aqui lê do primário ou do que a URI definir"
+    )
+    mongodb_max_staleness_segundos: int = Field(
+        default=-1,
+        description="Atraso máximo (s) aceito de um secundário nas leituras fora do primário "
+                    "(-1 = sem limite; senão, pelo menos 90)"
+    )
+    health_intervalo_segundos: float = Field(
+        default=10.0,
+        gt=0,
+        description="Intervalo em segundos entre as verificações de saúde do MongoDB em segundo plano"
+    )
+    health_timeout_segundos: float = Field(
+        default=2.0,
+        gt=0,
+        description="Tempo máximo em segundos de espera pelo ping de verificação de saúde"
+    )
     
     # Configurações de Segurança JWT
     secret_key: str = Field(
@@ -36,6 +92,136 @@ class Settings(BaseSettings):
         default=30,
         description="Tempo de expiração do token em minutos"
     )
+    bcrypt_rounds: int = Field(
+        default=12,
+        ge=4,
+        le=31,
+        description="Custo (rounds) do bcrypt para novos hashes de senha"
+    )
+    senha_hash_max_concorrencia: int = Field(
+        default=4,
+        ge=1,
+        description="Máximo de operações de hash de senha executando ao mesmo tempo (threads dedicadas)"
+    )
+    usuarios_cache_ttl_segundos: int = Field(
+        default=30,
+        ge=0,
+        description="Tempo em segundos que o usuário autenticado fica em cache (0 desabilita); "
+                    "alterações e desativações valem em no máximo esse tempo"
+    )
+    usuarios_cache_max: int = Field(
+        default=1024,
+        ge=1,
+        description="Quantidade máxima de usuários/tokens mantidos no cache de autenticação"
+    )
+    
+    # Configurações de processamento de leads
+    parser_engine: Literal["lxml", "bs4"] = Field(
+        default="lxml",
+        description="Motor de parsing dos arquivos do Portal NEAD: 'lxml' (incremental) ou 'bs4'"
+    )
+    upload_max_bytes: int = Field(
+        default=50 * 1024 * 1024,
+        description="Tamanho máximo aceito para arquivos de upload, em bytes"
+    )
+    upload_batch_size: int = Field(
+        default=1000,
+        ge=1,
+        description="Quantidade de leads por insert_many no upload de arquivos"
+    )
+    processamento_chunk_size: int = Field(
+        default=1000,
+        ge=1,
+        description="Quantidade de leads por consulta $in e por bulk_write no processamento de lotes"
+    )
+    
+    # Configurações de estatísticas
+    estatisticas_cache_ttl_segundos: int = Field(
+        default=15,
+        ge=0,
+        description="Tempo em segundos que as respostas de estatísticas ficam em cache (0 desabilita)"
+    )
+    estatisticas_timezone: str = Field(
+        default="America/Sao_Paulo",
+        description="Fuso horário padrão usado para agrupar as séries temporais por hora/dia/semana"
+    )
+    
+    # Configurações do Bitrix24
+    bitrix_webhook_url: Optional[str] = Field(
+        default=None,
+        description="URL base do webhook do Bitrix24 (inclui o token de acesso); obrigatória para enviar leads"
+    )
+    bitrix_timeout: float = Field(
+        default=30.0,
+        description="Timeout das requisições ao Bitrix24 em segundos"
+    )
+    bitrix_max_connections: int = Field(
+        default=20,
+        description="Máximo de conexões simultâneas no pool HTTP do Bitrix24"
+    )
+    bitrix_max_keepalive_connections: int = Field(
+        default=10,
+        description="Máximo de conexões ociosas mantidas abertas (keep-alive)"
+    )
+    bitrix_keepalive_expiry: float = Field(
+        default=30.0,
+        description="Tempo em segundos que uma conexão ociosa fica aberta"
+    )
+    bitrix_http2: bool = Field(
+        default=False,
+        description="Habilita HTTP/2 nas requisições ao Bitrix24"
+    )
+    bitrix_concorrencia: int = Field(
+        default=10,
+        description="Máximo de envios simultâneos ao Bitrix24 por disparo"
+    )
+    bitrix_modo_envio: str = Field(
+        default="batch",
+        description="'batch' (até 50 leads por requisição via método batch) ou 'individual'"
+    )
+    bitrix_batch_size: int = Field(
+        default=50,
+        ge=1,
+        le=50,
+        description="Leads por requisição no modo batch (máximo 50)"
+    )
+    disparo_intervalo_progresso: int = Field(
+        default=100,
+        ge=1,
+        description="A cada quantos leads enviados o progresso do disparo é gravado"
+    )
+    disparo_lease_segundos: int = Field(
+        default=300,
+        ge=10,
+        description="Sem heartbeat por este tempo, o disparo é considerado interrompido e pode ser retomado"
+    )
+    bitrix_requisicoes_por_segundo: float = Field(
+        default=2.0,
+        gt=0,
+        description="Taxa máxima de requisições por segundo ao webhook do Bitrix24"
+    )
+    bitrix_capacidade_burst: int = Field(
+        default=10,
+        ge=1,
+        description="Requisições permitidas em rajada antes de aplicar a taxa"
+    )
+    bitrix_max_tentativas: int = Field(
+        default=5,
+        ge=1,
+        description="Tentativas por requisição quando o Bitrix24 sinaliza throttling"
+    )
+    bitrix_backoff_inicial: float = Field(
+        default=1.0,
+        description="Espera inicial em segundos do backoff exponencial após throttling"
+    )
+    
+    @field_validator("mongodb_max_staleness_segundos")
+    @classmethod
+    def validar_max_staleness(cls, v: int) -> int:
+        # O MongoDB recusa maxStalenessSeconds entre 0 e 89
+        if v != -1 and v < 90:
+            raise ValueError("mongodb_max_staleness_segundos deve ser -1 (sem limite) ou pelo menos 90")
+        return v
     
     class Config:
         env_file = ".env"
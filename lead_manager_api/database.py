@@ -1,28 +1,56 @@
 """
 Módulo de conexão com o banco de dados MongoDB.
+Usa o cliente assíncrono nativo do PyMongo: todas as operações devem ser
+aguardadas (await), para não bloquear o event loop.
 """
-from pymongo import MongoClient
-from pymongo.database import Database
-from pymongo.collection import Collection
+from functools import lru_cache
+from typing import Optional
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.asynchronous.collection import AsyncCollection
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
 from lead_manager_api.config import get_settings
 
-_client: MongoClient | None = None
-_database: Database | None = None
+_client: AsyncMongoClient | None = None
+_database: AsyncDatabase | None = None
 
 
-def get_mongo_client() -> MongoClient:
+@lru_cache()
+def _read_preference(modo: str):
+    """Converte o nome da preferência de leitura (ex.: 'secondaryPreferred')."""
+    try:
+        mode = read_pref_mode_from_name(modo)
+    except ValueError:
+        raise ValueError(f"Preferência de leitura inválida: {modo}")
+
+    staleness = get_settings().mongodb_max_staleness_segundos
+    return make_read_preference(mode, None, staleness if modo != "primary" else -1)
+
+
+def get_mongo_client() -> AsyncMongoClient:
     global _client
     if _client is None:
         settings = get_settings()
-        _client = MongoClient(
+
+        # Valida as preferências de leitura já na conexão, e não na primeira consulta
+        for modo in settings.mongodb_read_preferences.values():
+            _read_preference(modo)
+
+        _client = AsyncMongoClient(
             settings.mongodb_uri,
-            serverSelectionTimeoutMS=5000
+            maxPoolSize=settings.mongodb_max_pool_size,
+            minPoolSize=settings.mongodb_min_pool_size,
+            maxIdleTimeMS=settings.mongodb_max_idle_time_ms or None,
+            serverSelectionTimeoutMS=settings.mongodb_server_selection_timeout_ms,
+            connectTimeoutMS=settings.mongodb_connect_timeout_ms,
+            socketTimeoutMS=settings.mongodb_socket_timeout_ms or None,
+            compressors=settings.mongodb_compressores or None
         )
     return _client
 
 
-def get_database() -> Database:
+def get_database() -> AsyncDatabase:
     global _database
     if _database is None:
         settings = get_settings()
@@ -31,90 +59,122 @@ def get_database() -> Database:
     return _database
 
 
+def get_collection(nome: str, leitura: Optional[str] = None) -> AsyncCollection:
+    """
+    Coleção `nome` com a preferência de leitura configurada para o perfil
+    `leitura` (ex.: 'estatisticas') ou, na falta dele, para a própria coleção.
+    """
+    preferencias = get_settings().mongodb_read_preferences
+    modo = preferencias.get(leitura) if leitura else None
+    modo = modo or preferencias.get(nome)
+
+    collection = get_database()[nome]
+    if modo is None:
+        return collection
+    return collection.with_options(read_preference=_read_preference(modo))
+
+
 # ==================== COLEÇÕES ====================
 
-def get_users_collection() -> Collection:
+def get_users_collection(leitura: Optional[str] = None) -> AsyncCollection:
     """Coleção de usuários"""
-    return get_database()["users"]
+    return get_collection("users", leitura)
 
 
-def get_consultores_collection() -> Collection:
+def get_consultores_collection(leitura: Optional[str] = None) -> AsyncCollection:
     """Coleção de consultores"""
-    return get_database()["consultores"]
+    return get_collection("consultores", leitura)
 
 
-def get_produtos_collection() -> Collection:
+def get_produtos_collection(leitura: Optional[str] = None) -> AsyncCollection:
     """Coleção de produtos (Pós, Tec, Profissionalizante)"""
-    return get_database()["produtos"]
+    return get_collection("produtos", leitura)
 
 
-def get_leads_collection() -> Collection:
+def get_leads_collection(leitura: Optional[str] = None) -> AsyncCollection:
     """Coleção de leads"""
-    return get_database()["leads"]
+    return get_collection("leads", leitura)
 
 
-def get_lotes_collection() -> Collection:
+def get_lotes_collection(leitura: Optional[str] = None) -> AsyncCollection:
     """Coleção de lotes de upload"""
-    return get_database()["lotes"]
+    return get_collection("lotes", leitura)
 
 
-def get_disparos_collection() -> Collection:
+def get_disparos_collection(leitura: Optional[str] = None) -> AsyncCollection:
     """Coleção de histórico de disparos"""
-    return get_database()["disparos"]
+    return get_collection("disparos", leitura)
 
 
-def get_historico_collection() -> Collection:
+def get_historico_collection(leitura: Optional[str] = None) -> AsyncCollection:
     """Coleção de histórico de candidatos já enviados"""
-    return get_database()["historico_candidatos"]
+    return get_collection("historico_candidatos", leitura)
 
 
-def get_estatisticas_consultores_collection() -> Collection:
+def get_estatisticas_consultores_collection(leitura: Optional[str] = None) -> AsyncCollection:
     """Coleção de estatísticas por consultor"""
-    return get_database()["estatisticas_consultores"]
+    return get_collection("estatisticas_consultores", leitura)
 
 
 # ==================== UTILIDADES ====================
 
-def test_connection() -> bool:
+async def test_connection() -> bool:
     try:
         client = get_mongo_client()
-        client.admin.command('ping')
+        await client.admin.command('ping')
         return True
     except (ConnectionFailure, ServerSelectionTimeoutError) as e:
         print(f"Erro de conexão com MongoDB: {e}")
         return False
 
 
-def close_connection() -> None:
+async def close_connection() -> None:
     global _client, _database
     if _client is not None:
-        _client.close()
+        await _client.close()
         _client = None
         _database = None
 
 
-def criar_indices():
+async def criar_indices():
     """Cria índices para melhor performance"""
     # Índice único para candidato_id no histórico
-    get_historico_collection().create_index("candidato_id", unique=True)
+    await get_historico_collection().create_index("candidato_id", unique=True)
+    await get_historico_collection().create_index([("enviado_em", -1), ("_id", -1)])
     
     # Índice para busca de leads por lote
-    get_leads_collection().create_index("lote_id")
-    get_leads_collection().create_index("candidato_id")
-    get_leads_collection().create_index([("candidato_id", 1), ("produto_id", 1)])
+    await get_leads_collection().create_index("lote_id")
+    await get_leads_collection().create_index([("lote_id", 1), ("_id", 1)])
+    await get_leads_collection().create_index("candidato_id")
+    await get_leads_collection().create_index([("candidato_id", 1), ("produto_id", 1)])
     
     # Índice para leads por consultor (NOVO)
-    get_leads_collection().create_index("consultor_id")
-    get_leads_collection().create_index([("consultor_id", 1), ("status", 1)])
-    get_leads_collection().create_index([("status", 1), ("enviado_em", -1)])
+    await get_leads_collection().create_index("consultor_id")
+    await get_leads_collection().create_index([("consultor_id", 1), ("status", 1)])
+    await get_leads_collection().create_index([("status", 1), ("enviado_em", -1)])
+    
+    # Índices para reivindicação de leads durante o disparo
+    await get_leads_collection().create_index([("lote_id", 1), ("status", 1), ("_id", 1)])
+    await get_leads_collection().create_index("claim_token", sparse=True)
+    await get_leads_collection().create_index([("disparo_id", 1), ("status", 1)])
     
     # Índice para consultores
-    get_consultores_collection().create_index("bitrix_id", unique=True)
+    await get_consultores_collection().create_index("bitrix_id", unique=True)
     
     # Índice para lotes
-    get_lotes_collection().create_index("produto_id")
-    get_lotes_collection().create_index([("created_at", -1)])
+    await get_lotes_collection().create_index("produto_id")
+    await get_lotes_collection().create_index([("created_at", -1)])
+    await get_lotes_collection().create_index([("created_at", -1), ("_id", -1)])
+    await get_lotes_collection().create_index([("status", 1), ("created_at", -1), ("_id", -1)])
     
     # Índice para disparos
-    get_disparos_collection().create_index("lote_id")
-    get_disparos_collection().create_index([("iniciado_em", -1)])
\ No newline at end of file
+    await get_disparos_collection().create_index("lote_id")
+    await get_disparos_collection().create_index([("iniciado_em", -1)])
+    await get_disparos_collection().create_index([("iniciado_em", -1), ("_id", -1)])
+    await get_disparos_collection().create_index([("status", 1), ("heartbeat_em", 1)])
+    
+    # Índice para os contadores pré-agregados de estatísticas (upsert por chave)
+    await get_estatisticas_consultores_collection().create_index(
+        [("hora", 1), ("consultor_id", 1), ("produto_id", 1)],
+        unique=True
+    )
\ No newline at end of file
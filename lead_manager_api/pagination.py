@@ -0,0 +1,93 @@
+"""
+Paginação por cursor (keyset) das listagens.
+O cursor é opaco para o cliente: guarda os valores das chaves de ordenação do
+último item da página, e a página seguinte começa logo depois dele, sem skip.
+"""
+
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Tuple
+from bson import json_util
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from pymongo.asynchronous.collection import AsyncCollection
+
+Ordenacao = List[Tuple[str, int]]
+
+
+def codificar_cursor(doc: Dict[str, Any], ordem: Ordenacao) -> str:
+    """Gera o cursor que aponta para depois de `doc`."""
+    valores = [doc.get(campo) for campo, _ in ordem]
+    # json_util preserva os tipos BSON (ObjectId, datetime) no cursor
+    return base64.urlsafe_b64encode(json_util.dumps(valores).encode()).decode()
+
+
+def decodificar_cursor(cursor: str, ordem: Ordenacao) -> List[Any]:
+    try:
+        valores = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError, binascii.Error, InvalidId):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    if not isinstance(valores, list) or len(valores) != len(ordem):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return valores
+
+
+def filtro_apos(ordem: Ordenacao, valores: List[Any]) -> Dict[str, Any]:
+    """
+    Filtro dos documentos que vêm depois de `valores` na ordenação:
+    (a > va) OU (a = va E b > vb) OU ..., respeitando a direção de cada campo.
+
+    Nulos (ou campos ausentes) vêm antes de qualquer valor na ordenação do
+    MongoDB, mas $gt/$lt nunca os comparam com outros tipos; por isso são
+    tratados à parte.
+    """
+    condicoes = []
+    for i, (campo, direcao) in enumerate(ordem):
+        valor = valores[i]
+        if direcao == -1 and valor is None:
+            continue  # depois de um nulo só há outros nulos, cobertos pelos campos seguintes
+
+        condicao = {anterior: v for (anterior, _), v in zip(ordem[:i], valores[:i])}
+        if direcao == 1:
+            condicao[campo] = {"$ne": None} if valor is None else {"$gt": valor}
+        else:
+            condicao["$or"] = [{campo: {"$lt": valor}}, {campo: None}]
+        condicoes.append(condicao)
+
+    return condicoes[0] if len(condicoes) == 1 else {"$or": condicoes}
+
+
+async def paginar(
+    collection: AsyncCollection,
+    filtro: Dict[str, Any],
+    ordem: Ordenacao,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    projecao: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Busca uma página de documentos.
+
+    A `ordem` deve terminar em um campo único (normalmente `_id`) para que o
+    cursor seja exato. `skip` é mantido por compatibilidade e só é usado
+    quando não há cursor.
+
+    Returns:
+        Tupla com (documentos da página, cursor da próxima página ou None)
+    """
+    if cursor:
+        filtro = {"$and": [filtro, filtro_apos(ordem, decodificar_cursor(cursor, ordem))]}
+
+    consulta = collection.find(filtro, projecao).sort(ordem)
+    if skip and not cursor:
+        consulta = consulta.skip(skip)
+
+    # Busca um item a mais para saber se existe próxima página
+    docs = await consulta.limit(limit + 1).to_list()
+    if len(docs) <= limit:
+        return docs, None
+
+    docs = docs[:limit]
+    return docs, codificar_cursor(docs[-1], ordem)
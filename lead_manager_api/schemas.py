@@ -25,6 +25,7 @@ class TipoProduto(str, Enum):
 class StatusLead(str, Enum):
     PENDENTE = "pendente"
     PROCESSADO = "processado"
+    ENVIANDO = "enviando"
     ENVIADO = "enviado"
     ERRO = "erro"
     DUPLICADO = "duplicado"
@@ -1,17 +1,52 @@
 """
 Módulo de segurança.
 Contém funções para hashing de senhas e manipulação de tokens JWT.
+
+O bcrypt é lento de propósito (~250 ms por operação); nas rotas async use
+as versões `_async`, que rodam em um pool de threads dedicado e limitado
+para não bloquear o event loop.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from lead_manager_api.config import get_settings
 from lead_manager_api.schemas import TokenData
 
-# Contexto para hashing de senhas usando bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+@lru_cache()
+def get_pwd_context() -> CryptContext:
+    """Contexto para hashing de senhas usando bcrypt, com o custo configurado."""
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=get_settings().bcrypt_rounds
+    )
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Pool de threads das operações de hash (limita quantas rodam ao mesmo tempo)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().senha_hash_max_concorrencia,
+            thread_name_prefix="senha-hash"
+        )
+    return _executor
+
+
+def shutdown_password_executor() -> None:
+    """Encerra o pool de threads de hash (usado no desligamento da aplicação)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
 
 
 def get_password_hash(password: str) -> str:
@@ -24,7 +59,7 @@ def get_password_hash(password: str) -> str:
     Returns:
         Hash da senha
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -38,7 +73,19 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True se a senha está correta, False caso contrário
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Versão de `get_password_hash` que roda no pool de threads de hash."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Versão de `verify_password` que roda no pool de threads de hash."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), verify_password, plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
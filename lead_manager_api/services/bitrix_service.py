@@ -2,26 +2,213 @@
 Serviço de integração com Bitrix24.
 """
 
+import asyncio
+import random
+import time
 import httpx
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
+from urllib.parse import urlencode
+
+from lead_manager_api.config import get_settings
+
+
+# Máximo de comandos aceitos pelo método batch do Bitrix24
+LIMITE_BATCH = 50
+
+# Campo personalizado do Bitrix que guarda o ID do candidato no Portal NEAD
+CAMPO_CANDIDATO_ID = "UF_CRM_1750200103"
+
+# Código de erro retornado pelo Bitrix24 quando o limite de requisições é excedido
+ERRO_LIMITE_EXCEDIDO = "QUERY_LIMIT_EXCEEDED"
+
+
+class BitrixNaoConfiguradoError(RuntimeError):
+    """A URL do webhook do Bitrix24 (BITRIX_WEBHOOK_URL) não foi configurada."""
+
+
+class LimitadorTaxa:
+    """
+    Token bucket para limitar as requisições a um webhook do Bitrix24.
+    
+    A taxa é adaptativa: cai pela metade (e o bucket pausa) quando o Bitrix
+    sinaliza throttling, e volta a subir gradualmente a cada resposta normal,
+    até a taxa configurada.
+    """
+    
+    def __init__(self, taxa: float, capacidade: int, taxa_minima: float = 0.1):
+        """
+        Args:
+            taxa: Requisições por segundo permitidas
+            capacidade: Máximo de requisições em rajada (tamanho do bucket)
+            taxa_minima: Piso da taxa após reduções por throttling
+        """
+        self.taxa_maxima = taxa
+        self.taxa = taxa
+        self.taxa_minima = min(taxa_minima, taxa)
+        self.capacidade = capacidade
+        self._tokens = float(capacidade)
+        self._atualizado_em = time.monotonic()
+        self._pausado_ate = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _repor(self, agora: float) -> None:
+        self._tokens = min(self.capacidade, self._tokens + (agora - self._atualizado_em) * self.taxa)
+        self._atualizado_em = agora
+    
+    async def adquirir(self) -> None:
+        """Aguarda até haver um token disponível e o consome."""
+        async with self._lock:
+            while True:
+                agora = time.monotonic()
+                if agora < self._pausado_ate:
+                    await asyncio.sleep(self._pausado_ate - agora)
+                    continue
+                
+                self._repor(agora)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                await asyncio.sleep((1 - self._tokens) / self.taxa)
+    
+    def reduzir(self, pausa: float) -> None:
+        """Registra throttling: reduz a taxa pela metade e pausa por `pausa` segundos."""
+        agora = time.monotonic()
+        self._repor(agora)
+        self.taxa = max(self.taxa_minima, self.taxa / 2)
+        self._tokens = 0.0
+        self._pausado_ate = max(self._pausado_ate, agora + pausa)
+    
+    def aumentar(self) -> None:
+        """Registra uma resposta normal: recupera a taxa aos poucos."""
+        if self.taxa < self.taxa_maxima:
+            self._repor(time.monotonic())
+            self.taxa = min(self.taxa_maxima, self.taxa + self.taxa_maxima * 0.05)
+
+
+# Um limitador por webhook, compartilhado por todas as instâncias do serviço
+_limitadores: Dict[str, LimitadorTaxa] = {}
+
+
+def obter_limitador(webhook_url: str, taxa: float, capacidade: int) -> LimitadorTaxa:
+    """Retorna o limitador de taxa do webhook, criando-o se necessário."""
+    if webhook_url not in _limitadores:
+        _limitadores[webhook_url] = LimitadorTaxa(taxa, capacidade)
+    return _limitadores[webhook_url]
 
 
 class BitrixService:
     """Serviço para comunicação com a API do Bitrix24."""
     
-    def __init__(self, webhook_url: str):
+    def __init__(
+        self,
+        webhook_url: str,
+        timeout: float = 30.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        requisicoes_por_segundo: float = 2.0,
+        capacidade_burst: int = 10,
+        max_tentativas: int = 5,
+        backoff_inicial: float = 1.0
+    ):
         """
         Inicializa o serviço.
         
         Args:
             webhook_url: URL base do webhook do Bitrix24
+            timeout: Timeout das requisições em segundos
+            max_connections: Máximo de conexões simultâneas no pool
+            max_keepalive_connections: Máximo de conexões ociosas mantidas
+            keepalive_expiry: Tempo em segundos de uma conexão ociosa
+            http2: Habilita HTTP/2 (requer o extra httpx[http2])
+            requisicoes_por_segundo: Taxa máxima de requisições ao webhook
+            capacidade_burst: Requisições permitidas em rajada
+            max_tentativas: Tentativas por requisição quando há throttling
+            backoff_inicial: Espera inicial (s) do backoff exponencial
         """
         self.webhook_url = webhook_url.rstrip('/')
-        self.timeout = 30.0
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+        self.limitador = obter_limitador(self.webhook_url, requisicoes_por_segundo, capacidade_burst)
+        self.max_tentativas = max(1, max_tentativas)
+        self.backoff_inicial = backoff_inicial
     
-    async def criar_lead(
-        self,
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Cliente HTTP compartilhado, com pool de conexões keep-alive."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2
+            )
+        return self._client
+    
+    async def fechar(self) -> None:
+        """Fecha o cliente HTTP e suas conexões."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def _pausa_backoff(self, tentativa: int, response: Optional[httpx.Response] = None) -> float:
+        """Espera antes da próxima tentativa: Retry-After ou backoff exponencial com jitter."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.replace(".", "", 1).isdigit():
+                return float(retry_after)
+        return self.backoff_inicial * (2 ** (tentativa - 1)) * random.uniform(1.0, 1.5)
+    
+    async def _post(self, metodo: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Chama um método REST do Bitrix24 respeitando o limitador de taxa.
+        Repete com backoff quando o Bitrix sinaliza throttling (HTTP 429 ou
+        QUERY_LIMIT_EXCEEDED), até `max_tentativas`. Só esses casos garantem
+        que nada foi processado: outros erros (ex.: 503 de um proxy depois de o
+        lead ser criado) não são repetidos, para não duplicar crm.lead.add/batch.
+        
+        Returns:
+            JSON da resposta (com "error" em caso de falha)
+        """
+        tentativa = 0
+        while True:
+            await self.limitador.adquirir()
+            response = await self.client.post(f"{self.webhook_url}/{metodo}", json=payload)
+            
+            try:
+                result = response.json()
+            except ValueError:
+                result = {"error": f"HTTP {response.status_code}", "error_description": response.text[:200]}
+            if response.is_error and "error" not in result:
+                result = {"error": f"HTTP {response.status_code}", "error_description": response.text[:200]}
+            
+            throttling = (
+                response.status_code == 429
+                or result.get("error") == ERRO_LIMITE_EXCEDIDO
+            )
+            if not throttling:
+                self.limitador.aumentar()
+                return result
+            
+            if result.get("error") != ERRO_LIMITE_EXCEDIDO:
+                result = {"error": ERRO_LIMITE_EXCEDIDO, "error_description": result.get("error_description", "")}
+            
+            tentativa += 1
+            if tentativa >= self.max_tentativas:
+                return result
+            # Só pausa os demais workers se ainda houver nova tentativa
+            self.limitador.reduzir(self._pausa_backoff(tentativa, response))
+    
+    @staticmethod
+    def montar_campos(
         nome: str,
         telefone: str,
         consultor_bitrix_id: int,
@@ -33,13 +220,7 @@ class BitrixService:
         base: Optional[str] = None,
         campos_extras: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """
-        Cria um lead no Bitrix24.
-        
-        Returns:
-            Dicionário com resultado da operação
-        """
-        # Monta o payload
+        """Monta os campos (fields) de um lead no formato do Bitrix24."""
         fields = {
             "TITLE": nome,
             "NAME": nome,
@@ -57,7 +238,7 @@ class BitrixService:
         if polo:
             fields["UF_CRM_1750200048"] = polo
         if candidato_id:
-            fields["UF_CRM_1750200103"] = candidato_id
+            fields[CAMPO_CANDIDATO_ID] = candidato_id
         if base:
             fields["UF_CRM_1750207963"] = base
         
@@ -65,30 +246,50 @@ class BitrixService:
         if campos_extras:
             fields.update(campos_extras)
         
+        return fields
+    
+    async def criar_lead(
+        self,
+        nome: str,
+        telefone: str,
+        consultor_bitrix_id: int,
+        company_title: str = "Unicesumar",
+        cpf: Optional[str] = None,
+        curso: Optional[str] = None,
+        polo: Optional[str] = None,
+        candidato_id: Optional[str] = None,
+        base: Optional[str] = None,
+        campos_extras: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Cria um lead no Bitrix24.
+        
+        Returns:
+            Dicionário com resultado da operação
+        """
+        fields = self.montar_campos(
+            nome, telefone, consultor_bitrix_id, company_title,
+            cpf, curso, polo, candidato_id, base, campos_extras
+        )
+        
         payload = {"fields": fields}
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.webhook_url}/crm.lead.add.json",
-                    json=payload
-                )
-                
-                result = response.json()
-                
-                if "error" in result:
-                    return {
-                        "sucesso": False,
-                        "erro": result.get("error_description", result.get("error")),
-                        "bitrix_response": result
-                    }
-                
+            result = await self._post("crm.lead.add.json", payload)
+            
+            if "error" in result:
                 return {
-                    "sucesso": True,
-                    "lead_id": result.get("result"),
+                    "sucesso": False,
+                    "erro": result.get("error_description", result.get("error")),
                     "bitrix_response": result
                 }
-                
+            
+            return {
+                "sucesso": True,
+                "lead_id": result.get("result"),
+                "bitrix_response": result
+            }
+            
         except httpx.TimeoutException:
             return {
                 "sucesso": False,
@@ -100,20 +301,205 @@ class BitrixService:
                 "erro": str(e)
             }
     
+    async def criar_leads_em_lote(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Cria vários leads usando o método `batch` do Bitrix24, com até
+        LIMITE_BATCH comandos `crm.lead.add` por requisição.
+        
+        Args:
+            leads: Lista de dicionários com os argumentos de `montar_campos`
+        
+        Returns:
+            Lista de resultados, na mesma ordem de `leads`, no mesmo formato
+            de `criar_lead`
+        """
+        resultados: List[Dict[str, Any]] = []
+        for inicio in range(0, len(leads), LIMITE_BATCH):
+            resultados.extend(await self._enviar_batch_com_retentativas(leads[inicio:inicio + LIMITE_BATCH]))
+        return resultados
+    
+    async def _enviar_batch_com_retentativas(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Reenvia apenas os comandos do batch recusados por throttling."""
+        resultados: List[Dict[str, Any]] = [{} for _ in leads]
+        pendentes = list(range(len(leads)))
+        
+        for tentativa in range(1, self.max_tentativas + 1):
+            parciais = await self._enviar_batch([leads[i] for i in pendentes])
+            
+            limitados = []
+            for indice, resultado in zip(pendentes, parciais):
+                resultados[indice] = resultado
+                if resultado.pop("limite_excedido", False):
+                    limitados.append(indice)
+            
+            if not limitados or tentativa == self.max_tentativas:
+                break
+            
+            self.limitador.reduzir(self._pausa_backoff(tentativa))
+            pendentes = limitados
+        
+        return resultados
+    
+    async def _enviar_batch(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Envia um único batch (até LIMITE_BATCH leads)."""
+        cmd = {
+            f"lead_{i}": "crm.lead.add?" + urlencode(_codificar_query({"fields": self.montar_campos(**dados)}))
+            for i, dados in enumerate(leads)
+        }
+        
+        try:
+            result = await self._post("batch.json", {"halt": 0, "cmd": cmd})
+            
+            if "error" in result:
+                erro = result.get("error_description", result.get("error"))
+                return [{"sucesso": False, "erro": erro, "bitrix_response": result} for _ in leads]
+            
+            # Bitrix devolve [] em vez de {} quando não há itens
+            retorno = result.get("result") or {}
+            sucessos = retorno.get("result") or {}
+            erros = retorno.get("result_error") or {}
+            if not isinstance(sucessos, dict):
+                sucessos = {}
+            if not isinstance(erros, dict):
+                erros = {}
+            
+            resultados = []
+            for chave in cmd:
+                if chave in erros:
+                    erro = erros[chave]
+                    codigo = erro.get("error") if isinstance(erro, dict) else None
+                    if isinstance(erro, dict):
+                        erro = erro.get("error_description", erro.get("error"))
+                    resultados.append({
+                        "sucesso": False,
+                        "erro": erro or "Erro desconhecido",
+                        "bitrix_response": erros[chave],
+                        "limite_excedido": codigo == ERRO_LIMITE_EXCEDIDO
+                    })
+                elif sucessos.get(chave):
+                    resultados.append({
+                        "sucesso": True,
+                        "lead_id": sucessos[chave],
+                        "bitrix_response": {"result": sucessos[chave]}
+                    })
+                else:
+                    resultados.append({
+                        "sucesso": False,
+                        "erro": "Comando sem resposta no batch do Bitrix24"
+                    })
+            return resultados
+            
+        except httpx.TimeoutException:
+            return [{"sucesso": False, "erro": "Timeout na conexão com Bitrix24"} for _ in leads]
+        except Exception as e:
+            return [{"sucesso": False, "erro": str(e)} for _ in leads]
+    
+    async def buscar_leads_por_candidato(self, candidato_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Procura no Bitrix24 leads já criados para os candidatos informados
+        (usado para reconciliar envios interrompidos antes da confirmação).
+        
+        Returns:
+            Dicionário candidato_id → lead do Bitrix (com ID e ASSIGNED_BY_ID)
+        
+        Raises:
+            RuntimeError: se o Bitrix24 não responder à consulta
+        """
+        encontrados: Dict[str, Dict[str, Any]] = {}
+        
+        for inicio in range(0, len(candidato_ids), LIMITE_BATCH):
+            grupo = candidato_ids[inicio:inicio + LIMITE_BATCH]
+            cmd = {
+                f"busca_{i}": "crm.lead.list?" + urlencode(_codificar_query({
+                    "filter": {CAMPO_CANDIDATO_ID: candidato_id},
+                    "select": ["ID", "ASSIGNED_BY_ID"]
+                }))
+                for i, candidato_id in enumerate(grupo)
+            }
+            
+            result = await self._post("batch.json", {"halt": 0, "cmd": cmd})
+            if "error" in result:
+                raise RuntimeError(result.get("error_description") or result["error"])
+            
+            retorno = result.get("result") or {}
+            if retorno.get("result_error"):
+                raise RuntimeError(f"Falha ao consultar leads no Bitrix24: {retorno['result_error']}")
+            
+            listas = retorno.get("result") or {}
+            for i, candidato_id in enumerate(grupo):
+                leads = listas.get(f"busca_{i}") if isinstance(listas, dict) else None
+                if leads:
+                    encontrados[candidato_id] = leads[0]
+        
+        return encontrados
+    
     async def verificar_conexao(self) -> bool:
         """Verifica se a conexão com o Bitrix está funcionando."""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.webhook_url}/profile.json"
-                )
-                return response.status_code == 200
+            await self.limitador.adquirir()
+            response = await self.client.get(
+                f"{self.webhook_url}/profile.json",
+                timeout=10.0
+            )
+            return response.status_code == 200
         except:
             return False
 
 
+def _codificar_query(valor: Any, prefixo: str = "") -> List[Tuple[str, str]]:
+    """
+    Achata dicionários/listas aninhados em pares chave=valor no formato
+    `fields[PHONE][0][VALUE]`, usado nos comandos do método batch.
+    """
+    if isinstance(valor, dict):
+        itens = valor.items()
+    elif isinstance(valor, (list, tuple)):
+        itens = enumerate(valor)
+    else:
+        return [(prefixo, str(valor))]
+    
+    pares: List[Tuple[str, str]] = []
+    for chave, item in itens:
+        nome = f"{prefixo}[{chave}]" if prefixo else str(chave)
+        pares.extend(_codificar_query(item, nome))
+    return pares
+
+
+_bitrix_service: Optional[BitrixService] = None
+
+
 def obter_bitrix_service() -> BitrixService:
-    """Factory para criar instância do BitrixService."""
-    # URL do webhook - pode ser movida para config depois
-    webhook_url = "https://hagperformance.bitrix24.com.br/rest/10/2bw621q6mkhdklgz"
-    return BitrixService(webhook_url)
\ No newline at end of file
+    """
+    Retorna a instância compartilhada do BitrixService.
+
+    Raises:
+        BitrixNaoConfiguradoError: Se BITRIX_WEBHOOK_URL não estiver definida
+    """
+    global _bitrix_service
+    if _bitrix_service is None:
+        settings = get_settings()
+        if not settings.bitrix_webhook_url:
+            raise BitrixNaoConfiguradoError(
+                "BITRIX_WEBHOOK_URL não configurada: defina a URL do webhook do Bitrix24 no .env"
+            )
+        _bitrix_service = BitrixService(
+            settings.bitrix_webhook_url,
+            timeout=settings.bitrix_timeout,
+            max_connections=settings.bitrix_max_connections,
+            max_keepalive_connections=settings.bitrix_max_keepalive_connections,
+            keepalive_expiry=settings.bitrix_keepalive_expiry,
+            http2=settings.bitrix_http2,
+            requisicoes_por_segundo=settings.bitrix_requisicoes_por_segundo,
+            capacidade_burst=settings.bitrix_capacidade_burst,
+            max_tentativas=settings.bitrix_max_tentativas,
+            backoff_inicial=settings.bitrix_backoff_inicial
+        )
+    return _bitrix_service
+
+
+async def fechar_bitrix_service() -> None:
+    """Fecha o cliente HTTP da instância compartilhada."""
+    global _bitrix_service
+    if _bitrix_service is not None:
+        await _bitrix_service.fechar()
+        _bitrix_service = None
\ No newline at end of file
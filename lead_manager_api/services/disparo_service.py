@@ -0,0 +1,619 @@
+"""
+Serviço de disparo de leads para o Bitrix24.
+Envia os leads de um lote com paralelismo limitado, individualmente ou pelo
+método batch do Bitrix24, distribuindo entre os consultores em round-robin.
+
+Os disparos rodam em tarefas de background e são seguros contra quedas:
+- cada lead é reivindicado atomicamente (status "enviando" + claim_token)
+  antes do envio, então duas réplicas nunca enviam o mesmo lead;
+- o disparo tem um dono (owner) que renova um heartbeat; se o heartbeat
+  expirar, outra instância pode assumir o disparo e retomá-lo;
+- na retomada, leads que ficaram "enviando" são conferidos no Bitrix24
+  antes de serem reenviados, mas só depois de um lease desde a reivindicação,
+  pois a execução anterior pode estar apenas lenta e ainda concluir o envio;
+- resultados e contadores só são gravados enquanto a execução é dona do
+  disparo e dos leads, então uma execução que perdeu a posse não conta em dobro.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from lead_manager_api.config import get_settings
+from lead_manager_api.schemas import StatusLead
+from lead_manager_api.database import (
+    get_leads_collection, get_historico_collection, get_disparos_collection,
+    get_lotes_collection, get_produtos_collection, get_consultores_collection
+)
+from lead_manager_api.services.bitrix_service import BitrixService
+from lead_manager_api.services.estatisticas_service import registrar_envios
+
+# Tarefas de disparo em execução neste processo (referência evita coleta pelo GC)
+_tarefas: Set[asyncio.Task] = set()
+
+# Heartbeat gravado ao liberar um disparo: fica expirado na hora
+HEARTBEAT_LIBERADO = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def novo_owner() -> str:
+    """Gera o identificador de dono de uma execução de disparo."""
+    return uuid.uuid4().hex
+
+
+def iniciar_disparo(disparo_id: str, owner: str, bitrix: BitrixService) -> None:
+    """Agenda a execução do disparo em background e retorna imediatamente."""
+    tarefa = asyncio.create_task(
+        executar_disparo(disparo_id, owner, bitrix),
+        name=f"disparo-{disparo_id}"
+    )
+    _tarefas.add(tarefa)
+    tarefa.add_done_callback(_tarefas.discard)
+
+
+async def assumir_disparo(disparo_id: str) -> Optional[str]:
+    """
+    Assume atomicamente um disparo interrompido: em andamento com heartbeat
+    expirado, ou finalizado com erro.
+
+    Returns:
+        O novo owner, ou None se o disparo não pode ser assumido
+    """
+    settings = get_settings()
+    owner = novo_owner()
+    agora = datetime.now(timezone.utc)
+    limite = agora - timedelta(seconds=settings.disparo_lease_segundos)
+
+    disparo = await get_disparos_collection().find_one_and_update(
+        {
+            "_id": disparo_id,
+            "consultores_ids": {"$exists": True},
+            "$or": [
+                {"status": "em_andamento", "heartbeat_em": {"$lt": limite}},
+                {"status": "erro"}
+            ]
+        },
+        {
+            "$set": {
+                "owner": owner,
+                "heartbeat_em": agora,
+                "status": "em_andamento",
+                "finalizado_em": None
+            },
+            "$unset": {"erro": ""}
+        },
+        projection={"_id": 1}
+    )
+    return owner if disparo else None
+
+
+async def retomar_disparos_pendentes(bitrix: BitrixService) -> List[str]:
+    """
+    Retoma todos os disparos em andamento cujo heartbeat expirou
+    (ex.: a instância que os executava caiu).
+
+    Returns:
+        IDs dos disparos retomados por esta instância
+    """
+    settings = get_settings()
+    limite = datetime.now(timezone.utc) - timedelta(seconds=settings.disparo_lease_segundos)
+
+    candidatos = await get_disparos_collection().find(
+        {"status": "em_andamento", "heartbeat_em": {"$lt": limite}},
+        {"_id": 1}
+    ).to_list()
+
+    retomados = []
+    for disparo in candidatos:
+        owner = await assumir_disparo(disparo["_id"])
+        if owner:
+            iniciar_disparo(disparo["_id"], owner, bitrix)
+            retomados.append(disparo["_id"])
+    return retomados
+
+
+async def executar_disparo(disparo_id: str, owner: str, bitrix: BitrixService) -> None:
+    """Executa (ou retoma) o disparo e marca o documento como concluído (ou erro)."""
+    settings = get_settings()
+    disparos = get_disparos_collection()
+    controle = {"ativo": True}
+
+    heartbeat = asyncio.create_task(
+        _manter_heartbeat(disparo_id, owner, settings.disparo_lease_segundos / 3, controle)
+    )
+
+    try:
+        disparo = await disparos.find_one({"_id": disparo_id})
+        lote = await get_lotes_collection().find_one({"_id": disparo["lote_id"]})
+        produto = await get_produtos_collection().find_one({"_id": ObjectId(disparo["produto_id"])})
+        if not lote or not produto:
+            raise RuntimeError("Lote ou produto do disparo não encontrado")
+
+        consultores = await _carregar_consultores(disparo["consultores_ids"])
+        if not consultores:
+            raise RuntimeError("Nenhum consultor do disparo está disponível")
+
+        progresso = _Progresso(disparo_id, owner, settings.disparo_intervalo_progresso)
+        try:
+            while controle["ativo"]:
+                # Confere no Bitrix os leads que ficaram "enviando" numa execução anterior
+                espera = await _reconciliar_leads_enviando(disparo_id, lote, consultores, bitrix, progresso)
+
+                await enviar_leads(
+                    disparo_id, owner, consultores, produto, lote, bitrix,
+                    concorrencia=settings.bitrix_concorrencia,
+                    tamanho_batch=settings.bitrix_batch_size if settings.bitrix_modo_envio == "batch" else None,
+                    progresso=progresso,
+                    controle=controle
+                )
+
+                if espera is None:
+                    break
+                # Restam leads reivindicados há pouco por outra execução: espera
+                # o lease deles vencer para conferi-los
+                await asyncio.sleep(espera)
+        finally:
+            await progresso.gravar()
+    except asyncio.CancelledError:
+        # Desligamento da aplicação: libera o disparo para que outra instância
+        # o retome sem esperar o heartbeat expirar
+        heartbeat.cancel()
+        await disparos.update_one(
+            {"_id": disparo_id, "owner": owner, "status": "em_andamento"},
+            {"$set": {"heartbeat_em": HEARTBEAT_LIBERADO}}
+        )
+        raise
+    except Exception as e:
+        await disparos.update_one(
+            {"_id": disparo_id, "owner": owner},
+            {"$set": {
+                "status": "erro",
+                "erro": str(e),
+                "finalizado_em": datetime.now(timezone.utc)
+            }}
+        )
+        return
+    finally:
+        heartbeat.cancel()
+
+    if not controle["ativo"]:
+        return  # Outra instância assumiu o disparo
+
+    # Finaliza disparo com os contadores recontados a partir dos leads: inclui os
+    # envios confirmados por uma execução anterior depois de perder a posse
+    leads_col = get_leads_collection()
+    await disparos.update_one(
+        {"_id": disparo_id, "owner": owner},
+        {"$set": {
+            "finalizado_em": datetime.now(timezone.utc),
+            "status": "concluido",
+            "enviados_sucesso": await leads_col.count_documents(
+                {"disparo_id": disparo_id, "status": StatusLead.ENVIADO.value}
+            ),
+            "enviados_erro": await leads_col.count_documents(
+                {"disparo_id": disparo_id, "status": StatusLead.ERRO.value}
+            )
+        }}
+    )
+
+
+async def cancelar_disparos() -> None:
+    """
+    Cancela os disparos em execução (usado no desligamento da aplicação).
+    Eles ficam "em_andamento" com o heartbeat liberado e são retomados pela
+    próxima verificação de disparos pendentes de qualquer instância.
+    """
+    tarefas = list(_tarefas)
+    for tarefa in tarefas:
+        tarefa.cancel()
+    await asyncio.gather(*tarefas, return_exceptions=True)
+
+
+async def enviar_leads(
+    disparo_id: str,
+    owner: str,
+    consultores: List[Dict[str, Any]],
+    produto: Dict[str, Any],
+    lote: Dict[str, Any],
+    bitrix: BitrixService,
+    concorrencia: int = 10,
+    tamanho_batch: Optional[int] = None,
+    progresso: Optional["_Progresso"] = None,
+    controle: Optional[Dict[str, bool]] = None
+) -> Dict[str, int]:
+    """
+    Envia os leads processados do lote para o Bitrix24 com no máximo
+    `concorrencia` requisições simultâneas. Cada worker reivindica um grupo
+    de leads por vez; as reivindicações do processo são feitas uma de cada
+    vez, junto com a reserva das posições do round-robin, então os grupos
+    não se dividem entre workers e o consultor de cada lead segue a ordem dos
+    leads no disparo, independente da ordem em que os envios terminam.
+
+    Se `tamanho_batch` for informado, os leads são agrupados e enviados pelo
+    método `batch` do Bitrix24 (até 50 leads por requisição).
+
+    A posse do disparo (`owner`) é conferida antes de cada reivindicação; se
+    foi perdida, os workers param.
+
+    Returns:
+        Dicionário com enviados_sucesso e enviados_erro
+    """
+    progresso = progresso or _Progresso(disparo_id, owner, 1)
+    controle = controle if controle is not None else {"ativo": True}
+    company_title = produto.get("bitrix_company_title", "Unicesumar")
+    # Serializa reivindicação + reserva da sequência entre os workers
+    reivindicacao = asyncio.Lock()
+
+    async def worker() -> None:
+        while controle["ativo"]:
+            async with reivindicacao:
+                if not controle["ativo"] or not await _ainda_dono(disparo_id, owner):
+                    controle["ativo"] = False
+                    return
+
+                grupo = await _reivindicar_leads(lote["_id"], disparo_id, tamanho_batch or 1)
+                if not grupo:
+                    return
+
+                # Round-robin entre consultores, pela sequência do disparo
+                inicio = await _reservar_sequencia(disparo_id, len(grupo))
+
+            itens = [
+                (lead, consultores[(inicio + i) % len(consultores)])
+                for i, lead in enumerate(grupo)
+            ]
+            dados = [
+                _dados_bitrix(lead, consultor, produto, company_title)
+                for lead, consultor in itens
+            ]
+
+            if tamanho_batch:
+                resultados = await bitrix.criar_leads_em_lote(dados)
+            else:
+                resultados = [await bitrix.criar_lead(**dados[0])]
+
+            sucesso, erro = await _registrar_resultados(itens, resultados, lote)
+            await progresso.registrar(sucesso, erro)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concorrencia))))
+
+    return progresso.totais
+
+
+class _Progresso:
+    """
+    Acumula os contadores do disparo e os grava em lotes de `$inc`, apenas
+    enquanto `owner` for o dono do disparo.
+    """
+
+    def __init__(self, disparo_id: str, owner: str, intervalo: int):
+        self.disparo_id = disparo_id
+        self.owner = owner
+        self.intervalo = max(1, intervalo)
+        self.totais = {"enviados_sucesso": 0, "enviados_erro": 0}
+        self._pendentes = {"enviados_sucesso": 0, "enviados_erro": 0}
+
+    async def registrar(self, sucesso: int, erro: int) -> None:
+        for chave, valor in (("enviados_sucesso", sucesso), ("enviados_erro", erro)):
+            self.totais[chave] += valor
+            self._pendentes[chave] += valor
+
+        if sum(self._pendentes.values()) >= self.intervalo:
+            await self.gravar()
+
+    async def gravar(self) -> None:
+        if not any(self._pendentes.values()):
+            return
+
+        incrementos, self._pendentes = self._pendentes, {"enviados_sucesso": 0, "enviados_erro": 0}
+        await get_disparos_collection().update_one(
+            {"_id": self.disparo_id, "owner": self.owner},
+            {"$inc": incrementos, "$set": {"atualizado_em": datetime.now(timezone.utc)}}
+        )
+
+
+async def _manter_heartbeat(
+    disparo_id: str,
+    owner: str,
+    intervalo: float,
+    controle: Dict[str, bool]
+) -> None:
+    """Renova o heartbeat do disparo; se perder a posse, sinaliza para parar."""
+    disparos = get_disparos_collection()
+    while True:
+        await asyncio.sleep(intervalo)
+        result = await disparos.update_one(
+            {"_id": disparo_id, "owner": owner, "status": "em_andamento"},
+            {"$set": {"heartbeat_em": datetime.now(timezone.utc)}}
+        )
+        if result.matched_count == 0:
+            controle["ativo"] = False
+            return
+
+
+async def _ainda_dono(disparo_id: str, owner: str) -> bool:
+    """Confere no banco se `owner` ainda é o dono do disparo em andamento."""
+    disparo = await get_disparos_collection().find_one(
+        {"_id": disparo_id, "owner": owner, "status": "em_andamento"},
+        {"_id": 1}
+    )
+    return disparo is not None
+
+
+async def _devolver_leads(filtro: Dict[str, Any]) -> None:
+    """Devolve para "processado" os leads "enviando" do filtro, liberando a reivindicação."""
+    await get_leads_collection().update_many(
+        {**filtro, "status": StatusLead.ENVIANDO.value},
+        {
+            "$set": {"status": StatusLead.PROCESSADO.value},
+            "$unset": {"claim_token": "", "claimed_em": "", "disparo_id": ""}
+        }
+    )
+
+
+async def _carregar_consultores(consultores_ids: List[str]) -> List[Dict[str, Any]]:
+    """Carrega os consultores do disparo, preservando a ordem do round-robin."""
+    object_ids = []
+    for cid in consultores_ids:
+        try:
+            object_ids.append(ObjectId(cid))
+        except InvalidId:
+            continue
+
+    por_id = {
+        str(doc["_id"]): doc
+        async for doc in get_consultores_collection().find({"_id": {"$in": object_ids}})
+    }
+    return [por_id[cid] for cid in consultores_ids if cid in por_id]
+
+
+async def _reivindicar_leads(lote_id: str, disparo_id: str, quantidade: int) -> List[Dict[str, Any]]:
+    """
+    Reivindica atomicamente até `quantidade` leads processados do lote,
+    passando-os para "enviando" com um claim_token exclusivo.
+    """
+    leads_col = get_leads_collection()
+
+    if quantidade == 1:
+        # Um lead: uma única operação atômica, sem disputa
+        lead = await leads_col.find_one_and_update(
+            {"lote_id": lote_id, "status": StatusLead.PROCESSADO.value},
+            {"$set": {
+                "status": StatusLead.ENVIANDO.value,
+                "claim_token": uuid.uuid4().hex,
+                "disparo_id": disparo_id,
+                "claimed_em": datetime.now(timezone.utc)
+            }},
+            sort=[("_id", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        return [lead] if lead else []
+
+    while True:
+        ids = [
+            doc["_id"]
+            async for doc in leads_col.find(
+                {"lote_id": lote_id, "status": StatusLead.PROCESSADO.value},
+                {"_id": 1}
+            ).sort("_id", 1).limit(quantidade)
+        ]
+        if not ids:
+            return []
+
+        claim_token = uuid.uuid4().hex
+        result = await leads_col.update_many(
+            {"_id": {"$in": ids}, "status": StatusLead.PROCESSADO.value},
+            {"$set": {
+                "status": StatusLead.ENVIANDO.value,
+                "claim_token": claim_token,
+                "disparo_id": disparo_id,
+                "claimed_em": datetime.now(timezone.utc)
+            }}
+        )
+        if result.modified_count:
+            return await leads_col.find({"claim_token": claim_token}).sort("_id", 1).to_list()
+        # Outra instância (ex.: um dono anterior ainda ativo) reivindicou esses
+        # leads primeiro: tenta os próximos
+
+
+async def _reservar_sequencia(disparo_id: str, quantidade: int) -> int:
+    """Reserva `quantidade` posições do round-robin e retorna a primeira."""
+    disparo = await get_disparos_collection().find_one_and_update(
+        {"_id": disparo_id},
+        {"$inc": {"sequencia": quantidade}},
+        projection={"sequencia": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    return disparo.get("sequencia", 0) if disparo else 0
+
+
+async def _reconciliar_leads_enviando(
+    disparo_id: str,
+    lote: Dict[str, Any],
+    consultores: List[Dict[str, Any]],
+    bitrix: BitrixService,
+    progresso: _Progresso
+) -> Optional[float]:
+    """
+    Resolve leads reivindicados por uma execução anterior que não chegou a
+    confirmar o envio: os que já existem no Bitrix24 são marcados como
+    enviados, os demais voltam para "processado" e serão reivindicados de novo.
+
+    Só considera leads reivindicados há mais de um lease: a execução anterior
+    pode estar apenas lenta, com a requisição ao Bitrix24 ainda em andamento.
+
+    Returns:
+        Segundos até o lease do próximo lead "enviando" mais recente vencer,
+        ou None se não restou nenhum
+    """
+    leads_col = get_leads_collection()
+    lease = timedelta(seconds=get_settings().disparo_lease_segundos)
+    limite = datetime.now(timezone.utc) - lease
+    filtro = {"disparo_id": disparo_id, "status": StatusLead.ENVIANDO.value}
+
+    pendentes = await leads_col.find(
+        {**filtro, "claimed_em": {"$not": {"$gte": limite}}},
+        {"candidato_id": 1, "claim_token": 1}
+    ).to_list()
+    if pendentes:
+        await _conferir_no_bitrix(pendentes, lote, consultores, bitrix, progresso)
+
+    recente = await leads_col.find_one(
+        {**filtro, "claimed_em": {"$gte": limite}},
+        {"claimed_em": 1},
+        sort=[("claimed_em", 1)]
+    )
+    if recente is None:
+        return None
+
+    claimed_em = recente["claimed_em"]
+    if claimed_em.tzinfo is None:
+        claimed_em = claimed_em.replace(tzinfo=timezone.utc)
+    return max(0.0, (claimed_em - limite).total_seconds()) + 1
+
+
+async def _conferir_no_bitrix(
+    pendentes: List[Dict[str, Any]],
+    lote: Dict[str, Any],
+    consultores: List[Dict[str, Any]],
+    bitrix: BitrixService,
+    progresso: _Progresso
+) -> None:
+    """Marca como enviados os leads que já existem no Bitrix24 e devolve os demais."""
+    encontrados = await bitrix.buscar_leads_por_candidato(
+        list({lead["candidato_id"] for lead in pendentes})
+    )
+    por_bitrix_id = {str(c["bitrix_id"]): c for c in consultores}
+
+    itens = []
+    resultados = []
+    devolver = []
+    for lead in pendentes:
+        lead_bitrix = encontrados.get(lead["candidato_id"])
+        if lead_bitrix is None:
+            devolver.append(lead["_id"])
+            continue
+
+        consultor = por_bitrix_id.get(str(lead_bitrix.get("ASSIGNED_BY_ID")), {"_id": None})
+        itens.append((lead, consultor))
+        resultados.append({"sucesso": True, "lead_id": lead_bitrix.get("ID")})
+
+    if itens:
+        sucesso, erro = await _registrar_resultados(itens, resultados, lote)
+        await progresso.registrar(sucesso, erro)
+
+    if devolver:
+        await _devolver_leads({"_id": {"$in": devolver}})
+
+
+def _dados_bitrix(
+    lead: Dict[str, Any],
+    consultor: Dict[str, Any],
+    produto: Dict[str, Any],
+    company_title: str
+) -> Dict[str, Any]:
+    """Argumentos de `BitrixService.criar_lead` para um lead."""
+    return {
+        "nome": lead["nome"],
+        "telefone": lead["celular"],
+        "consultor_bitrix_id": consultor["bitrix_id"],
+        "company_title": company_title,
+        "cpf": lead.get("cpf"),
+        "curso": lead.get("curso_nome") or lead.get("curso_codigo"),
+        "polo": lead.get("polo"),
+        "candidato_id": lead.get("candidato_id"),
+        "base": produto["nome"]
+    }
+
+
+async def _registrar_resultados(
+    itens: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+    resultados: List[Dict[str, Any]],
+    lote: Dict[str, Any]
+) -> Tuple[int, int]:
+    """
+    Confirma o resultado do envio de um grupo de leads com um bulk_write.
+    Só altera leads que ainda pertencem à reivindicação (claim_token) original,
+    e só eles entram no histórico, nas estatísticas e na contagem retornada.
+
+    Returns:
+        Tupla com (enviados_sucesso, enviados_erro)
+    """
+    leads_col = get_leads_collection()
+    agora = datetime.now(timezone.utc)
+    # Os leads confirmados recebem este token, para identificar quais ainda eram nossos
+    confirmacao = uuid.uuid4().hex
+    operacoes = []
+
+    for (lead, consultor), resultado in zip(itens, resultados):
+        filtro = {"_id": lead["_id"], "claim_token": lead["claim_token"]}
+
+        if resultado["sucesso"]:
+            # Atualiza lead como enviado
+            operacoes.append(UpdateOne(filtro, {
+                "$set": {
+                    "status": StatusLead.ENVIADO.value,
+                    "bitrix_lead_id": str(resultado.get("lead_id")),
+                    "consultor_id": str(consultor["_id"]) if consultor.get("_id") else None,
+                    "enviado_em": agora,
+                    "claim_token": confirmacao
+                },
+                "$unset": {"claimed_em": ""}
+            }))
+        else:
+            operacoes.append(UpdateOne(filtro, {
+                "$set": {
+                    "status": StatusLead.ERRO.value,
+                    "erro_envio": resultado.get("erro", "Erro desconhecido"),
+                    "claim_token": confirmacao
+                },
+                "$unset": {"claimed_em": ""}
+            }))
+
+    if not operacoes:
+        return 0, 0
+
+    result = await leads_col.bulk_write(operacoes, ordered=False)
+    if result.matched_count == len(operacoes):
+        confirmados = None  # todos ainda eram desta reivindicação
+    else:
+        confirmados = {
+            doc["_id"]
+            async for doc in leads_col.find({"claim_token": confirmacao}, {"_id": 1})
+        }
+    await leads_col.update_many({"claim_token": confirmacao}, {"$unset": {"claim_token": ""}})
+
+    historico_docs = []
+    envios = []
+    erros = 0
+    for (lead, consultor), resultado in zip(itens, resultados):
+        if confirmados is not None and lead["_id"] not in confirmados:
+            continue
+        if not resultado["sucesso"]:
+            erros += 1
+            continue
+
+        envios.append((str(consultor["_id"]) if consultor.get("_id") else None, lote["produto_id"], agora))
+
+        # Adiciona ao histórico para evitar duplicados futuros
+        historico_docs.append({
+            "candidato_id": lead["candidato_id"],
+            "produto_id": lote["produto_id"],
+            "enviado_em": agora,
+            "lote_id": lote["_id"]
+        })
+
+    # Contadores pré-agregados das estatísticas
+    await registrar_envios(envios)
+
+    if historico_docs:
+        try:
+            await get_historico_collection().insert_many(historico_docs, ordered=False)
+        except BulkWriteError:
+            pass  # Ignora candidatos que já estão no histórico
+
+    return len(historico_docs), erros
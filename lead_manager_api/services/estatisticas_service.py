@@ -0,0 +1,117 @@
+"""
+Serviço de estatísticas pré-agregadas de envio.
+Mantém na coleção estatisticas_consultores um contador de leads enviados por
+(consultor_id, produto_id, hora), incrementado a cada envio, para que as
+estatísticas não precisem varrer a coleção de leads.
+"""
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+from pymongo import UpdateOne
+
+from lead_manager_api.schemas import StatusLead
+from lead_manager_api.database import (
+    get_leads_collection, get_disparos_collection, get_estatisticas_consultores_collection
+)
+
+
+class DisparoEmAndamentoError(RuntimeError):
+    """Há disparos em andamento: os envios deles se perderiam na reconstrução dos contadores."""
+
+
+def hora_do_envio(momento: datetime) -> datetime:
+    """Início da hora (UTC) em que o envio aconteceu."""
+    if momento.tzinfo is not None:
+        momento = momento.astimezone(timezone.utc)
+    return momento.replace(minute=0, second=0, microsecond=0)
+
+
+async def registrar_envios(envios: Iterable[Tuple[Optional[str], str, datetime]]) -> None:
+    """
+    Incrementa os contadores com `$inc` + upsert, uma operação por
+    (consultor_id, produto_id, hora) distinta.
+
+    Args:
+        envios: Tuplas (consultor_id, produto_id, enviado_em) dos leads enviados
+    """
+    contagens = Counter(
+        (consultor_id, produto_id, hora_do_envio(enviado_em))
+        for consultor_id, produto_id, enviado_em in envios
+    )
+    if not contagens:
+        return
+
+    agora = datetime.now(timezone.utc)
+    await get_estatisticas_consultores_collection().bulk_write([
+        UpdateOne(
+            {"hora": hora, "consultor_id": consultor_id, "produto_id": produto_id},
+            {"$inc": {"leads": quantidade}, "$set": {"atualizado_em": agora}},
+            upsert=True
+        )
+        for (consultor_id, produto_id, hora), quantidade in contagens.items()
+    ], ordered=False)
+
+
+async def reconstruir_estatisticas() -> int:
+    """
+    Recalcula todos os contadores a partir dos leads enviados. A coleção é
+    substituída de uma vez ($out), então as leituras nunca a veem vazia.
+
+    Os incrementos feitos durante a reconstrução se perderiam na troca da
+    coleção, então ela é recusada enquanto houver disparo em andamento.
+
+    Returns:
+        Quantidade de contadores gerados
+
+    Raises:
+        DisparoEmAndamentoError: Se algum disparo estiver em andamento
+    """
+    if await get_disparos_collection().find_one({"status": "em_andamento"}, {"_id": 1}):
+        raise DisparoEmAndamentoError(
+            "Há disparos em andamento; reconstrua as estatísticas depois que eles terminarem"
+        )
+
+    collection = get_estatisticas_consultores_collection()
+
+    await get_leads_collection().aggregate([
+        {"$match": {"status": StatusLead.ENVIADO.value, "enviado_em": {"$type": "date"}}},
+        {"$group": {
+            "_id": {
+                "hora": {"$dateTrunc": {"date": "$enviado_em", "unit": "hour"}},
+                "consultor_id": "$consultor_id",
+                "produto_id": "$produto_id"
+            },
+            "leads": {"$sum": 1}
+        }},
+        {"$project": {
+            "_id": 0,
+            "hora": "$_id.hora",
+            "consultor_id": "$_id.consultor_id",
+            "produto_id": "$_id.produto_id",
+            "leads": 1,
+            "atualizado_em": "$$NOW"
+        }},
+        {"$out": collection.name}
+    ])
+
+    return await collection.count_documents({})
+
+
+async def _main() -> None:
+    from lead_manager_api.database import criar_indices, close_connection
+
+    try:
+        await criar_indices()
+        total = await reconstruir_estatisticas()
+        print(f"✅ Estatísticas reconstruídas: {total} contadores")
+    except DisparoEmAndamentoError as e:
+        print(f"❌ {e}")
+    finally:
+        await close_connection()
+
+
+if __name__ == "__main__":
+    # python -m lead_manager_api.services.estatisticas_service
+    asyncio.run(_main())
@@ -0,0 +1,143 @@
+"""
+Serviço de exportação de leads e histórico.
+Os arquivos são gerados enquanto o cursor do MongoDB é lido, em pedaços,
+sem carregar todos os registros em memória.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List
+from bson import ObjectId
+from openpyxl import Workbook
+
+COLUNAS_LEADS = [
+    "candidato_id", "nome", "celular", "cpf", "curso_codigo", "curso_nome", "polo",
+    "inscrito_por", "status_mensalidade", "status", "motivo_filtro", "consultor_id",
+    "bitrix_lead_id", "erro_envio", "enviado_em", "created_at"
+]
+
+COLUNAS_HISTORICO = ["candidato_id", "produto_id", "lote_id", "enviado_em"]
+
+FORMATOS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+LINHAS_POR_PEDACO = 500
+TAMANHO_PEDACO_ARQUIVO = 64 * 1024
+MAX_LINHAS_XLSX = 1_048_575  # limite de linhas do Excel, descontando o cabeçalho
+
+
+def _serializar(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, ObjectId):
+        return str(valor)
+    return valor
+
+
+def _celula(valor: Any) -> Any:
+    """Valor de uma célula de planilha (CSV/XLSX)."""
+    if valor is None:
+        return ""
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False, default=_serializar)
+    return _serializar(valor)
+
+
+async def gerar_ndjson(docs: AsyncIterable[Dict[str, Any]], colunas: List[str]) -> AsyncIterator[bytes]:
+    """Um objeto JSON por linha, com as colunas informadas e os demais campos do documento."""
+    linhas = []
+    async for doc in docs:
+        doc.pop("_id", None)
+        registro = {coluna: doc.pop(coluna, None) for coluna in colunas}
+        registro.update(doc)
+        linhas.append(json.dumps(registro, ensure_ascii=False, default=_serializar))
+
+        if len(linhas) >= LINHAS_POR_PEDACO:
+            yield ("\n".join(linhas) + "\n").encode("utf-8")
+            linhas = []
+
+    if linhas:
+        yield ("\n".join(linhas) + "\n").encode("utf-8")
+
+
+async def gerar_csv(docs: AsyncIterable[Dict[str, Any]], colunas: List[str]) -> AsyncIterator[bytes]:
+    """CSV com cabeçalho, em UTF-8 com BOM para abrir corretamente no Excel."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    buffer.write("\ufeff")
+    writer.writerow(colunas)
+
+    i = 0
+    async for doc in docs:
+        i += 1
+        writer.writerow([_celula(doc.get(coluna)) for coluna in colunas])
+
+        if i % LINHAS_POR_PEDACO == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def gerar_xlsx(docs: AsyncIterable[Dict[str, Any]], colunas: List[str]) -> AsyncIterator[bytes]:
+    """
+    Planilha XLSX montada em modo write-only (as linhas vão direto para o
+    disco) e enviada em pedaços a partir de um arquivo temporário.
+    A compactação e a leitura do arquivo rodam em thread.
+
+    O primeiro byte só sai depois de todo o cursor ser lido e o arquivo
+    compactado: em exportações grandes, proxies com timeout de leitura curto
+    podem derrubar a conexão antes disso (prefira CSV ou NDJSON, que saem
+    em pedaços desde o início).
+
+    Quem chama deve conferir antes o limite de linhas do Excel
+    (MAX_LINHAS_XLSX); se ele for ultrapassado mesmo assim, a geração falha
+    em vez de entregar um arquivo truncado.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Dados")
+    sheet.append(colunas)
+
+    fd, caminho = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        try:
+            linhas = 0
+            async for doc in docs:
+                if linhas >= MAX_LINHAS_XLSX:
+                    raise ValueError(f"A exportação passou do limite de {MAX_LINHAS_XLSX} linhas do XLSX")
+                linhas += 1
+                sheet.append([_celula(doc.get(coluna)) for coluna in colunas])
+        finally:
+            # Salvar fecha o workbook e remove os temporários do openpyxl,
+            # inclusive quando a exportação é interrompida
+            await asyncio.to_thread(workbook.save, caminho)
+
+        with open(caminho, "rb") as arquivo:
+            while pedaco := await asyncio.to_thread(arquivo.read, TAMANHO_PEDACO_ARQUIVO):
+                yield pedaco
+    finally:
+        os.remove(caminho)
+
+
+GERADORES = {
+    "ndjson": gerar_ndjson,
+    "csv": gerar_csv,
+    "xlsx": gerar_xlsx,
+}
+
+
+def exportar(docs: AsyncIterable[Dict[str, Any]], colunas: List[str], formato: str) -> AsyncIterator[bytes]:
+    """Gera o conteúdo do arquivo no `formato` (ndjson, csv ou xlsx)."""
+    return GERADORES[formato](docs, colunas)
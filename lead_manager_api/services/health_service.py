@@ -0,0 +1,151 @@
+"""
+Monitor de saúde da aplicação.
+Uma tarefa em segundo plano faz ping no MongoDB periodicamente e guarda o
+resultado; os endpoints de health só leem esse estado, sem acessar o banco.
+Na primeira vez que o MongoDB responde, cria os índices (e calcula os
+contadores de estatísticas, se ainda não existirem), e só a partir daí a
+aplicação é considerada pronta. A cada verificação com a aplicação pronta,
+retoma os disparos interrompidos (heartbeat expirado ou liberado).
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from lead_manager_api.config import get_settings
+from lead_manager_api.database import (
+    get_mongo_client, criar_indices, get_estatisticas_consultores_collection
+)
+from lead_manager_api.services.bitrix_service import obter_bitrix_service
+from lead_manager_api.services.disparo_service import retomar_disparos_pendentes
+from lead_manager_api.services.estatisticas_service import (
+    DisparoEmAndamentoError, reconstruir_estatisticas
+)
+
+_estado: Dict[str, Any] = {
+    "mongodb": False,
+    "inicializado": False,
+    "verificado_em": None,
+    "erro": None
+}
+_tarefa: Optional[asyncio.Task] = None
+# Contadores vazios na inicialização, ainda não reconstruídos
+_reconstrucao_pendente = False
+
+
+def status_saude() -> Dict[str, Any]:
+    """Último estado verificado pelo monitor."""
+    return dict(_estado)
+
+
+def pronto() -> bool:
+    """MongoDB respondendo e inicialização (índices) concluída."""
+    return _estado["mongodb"] and _estado["inicializado"]
+
+
+async def _ping(timeout: float) -> Optional[str]:
+    """Faz ping no MongoDB; retorna a mensagem de erro, ou None se respondeu."""
+    try:
+        await asyncio.wait_for(get_mongo_client().admin.command("ping"), timeout)
+        return None
+    except asyncio.TimeoutError:
+        return f"Sem resposta do MongoDB em {timeout}s"
+    except Exception as e:
+        # Inclui erros de configuração do cliente, não só falhas de rede
+        return f"{type(e).__name__}: {e}"
+
+
+async def _inicializar() -> None:
+    await criar_indices()
+    print("✓ Índices criados/verificados")
+
+    # Sem contadores (ex.: primeira implantação): calcula a partir dos leads enviados
+    global _reconstrucao_pendente
+    if await get_estatisticas_consultores_collection().find_one({}, {"_id": 1}) is None:
+        _reconstrucao_pendente = True
+        await _reconstruir_estatisticas()
+        if _reconstrucao_pendente:
+            print("⏳ Estatísticas serão reconstruídas quando os disparos em andamento terminarem")
+
+
+async def _reconstruir_estatisticas() -> None:
+    """Reconstrói os contadores pendentes, se nenhum disparo estiver em andamento."""
+    global _reconstrucao_pendente
+    if not _reconstrucao_pendente:
+        return
+    try:
+        total = await reconstruir_estatisticas()
+    except DisparoEmAndamentoError:
+        return  # tenta de novo nas próximas verificações
+    _reconstrucao_pendente = False
+    print(f"✓ Estatísticas reconstruídas: {total} contadores")
+
+
+async def _retomar_disparos() -> None:
+    if not get_settings().bitrix_webhook_url:
+        return  # sem webhook não há como retomar (avisado na inicialização)
+    try:
+        retomados = await retomar_disparos_pendentes(obter_bitrix_service())
+    except Exception as e:
+        print(f"✗ AVISO: Falha ao retomar disparos: {e}")
+        return
+    if retomados:
+        print(f"✓ {len(retomados)} disparo(s) interrompido(s) retomado(s)")
+
+
+async def verificar_saude() -> None:
+    """
+    Atualiza o estado com um ping, conclui a inicialização se pendente e
+    retoma os disparos interrompidos.
+    """
+    erro = await _ping(get_settings().health_timeout_segundos)
+
+    if erro is None and not _estado["mongodb"]:
+        print("✓ Conexão com MongoDB estabelecida")
+    elif erro is not None and (_estado["mongodb"] or _estado["verificado_em"] is None):
+        print(f"✗ AVISO: Falha ao conectar com MongoDB: {erro}")
+
+    _estado.update(mongodb=erro is None, erro=erro, verificado_em=datetime.now(timezone.utc))
+
+    if erro is None and not _estado["inicializado"]:
+        try:
+            await _inicializar()
+            _estado["inicializado"] = True
+        except Exception as e:
+            # Tenta de novo na próxima verificação
+            print(f"✗ AVISO: Falha na inicialização do banco: {e}")
+
+    if pronto():
+        try:
+            await _reconstruir_estatisticas()
+        except Exception as e:
+            print(f"✗ AVISO: Falha ao reconstruir estatísticas: {e}")
+        await _retomar_disparos()
+
+
+async def _monitorar() -> None:
+    intervalo = get_settings().health_intervalo_segundos
+    while True:
+        try:
+            await verificar_saude()
+        except Exception as e:
+            # O monitor nunca para: um erro inesperado só adia para a próxima verificação
+            print(f"✗ AVISO: Falha na verificação de saúde: {e}")
+        await asyncio.sleep(intervalo)
+
+
+def iniciar_monitor_saude() -> None:
+    """Inicia a tarefa de monitoramento (a primeira verificação é imediata)."""
+    global _tarefa
+    if _tarefa is None or _tarefa.done():
+        _tarefa = asyncio.create_task(_monitorar(), name="monitor-saude")
+
+
+async def parar_monitor_saude() -> None:
+    """Cancela a tarefa de monitoramento (usado no desligamento da aplicação)."""
+    global _tarefa
+    if _tarefa is not None:
+        _tarefa.cancel()
+        await asyncio.gather(_tarefa, return_exceptions=True)
+        _tarefa = None
+    _estado.update(mongodb=False, inicializado=False)
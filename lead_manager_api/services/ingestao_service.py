@@ -0,0 +1,149 @@
+"""
+Serviço de ingestão de arquivos do Portal NEAD.
+Encadeia parsing → extração → inserção como estágios de gerador, mantendo
+em memória apenas o preview e o lote de insert_many corrente. O parsing de
+cada lote roda em uma thread, para não bloquear o event loop.
+"""
+
+import asyncio
+from datetime import datetime
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Union
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import BulkWriteError
+
+from lead_manager_api.schemas import StatusLead
+from lead_manager_api.services.parser_service import iter_html_xls, extrair_lead_do_registro
+
+TAMANHO_PREVIEW = 10
+
+
+class ArquivoInvalidoError(ValueError):
+    """Erro de parsing do arquivo enviado."""
+
+
+def em_chunks(iteravel: Iterable[Any], tamanho: int) -> Iterator[List[Any]]:
+    """Agrupa os itens de um iterável em listas de até `tamanho` elementos."""
+    iterador = iter(iteravel)
+    while chunk := list(islice(iterador, tamanho)):
+        yield chunk
+
+
+async def inserir_em_lotes(
+    collection: AsyncCollection,
+    documentos: Iterable[Dict[str, Any]],
+    tamanho_lote: int
+) -> int:
+    """
+    Insere documentos com insert_many não ordenado, em lotes de `tamanho_lote`.
+
+    Returns:
+        Quantidade de documentos efetivamente inseridos
+    """
+    inseridos = 0
+    chunks = em_chunks(documentos, tamanho_lote)
+    # O próximo lote é lido (e o arquivo parseado) em uma thread
+    while chunk := await asyncio.to_thread(next, chunks, None):
+        try:
+            result = await collection.insert_many(chunk, ordered=False)
+            inseridos += len(result.inserted_ids)
+        except BulkWriteError as e:
+            inseridos += e.details.get("nInserted", 0)
+    return inseridos
+
+
+async def ingerir_arquivo(
+    conteudo: Union[bytes, BinaryIO],
+    leads_col: AsyncCollection,
+    lote_id: str,
+    produto_id: str,
+    mapeamento: Dict[str, int],
+    created_at: datetime,
+    engine: str = "lxml",
+    tamanho_lote: int = 1000
+) -> Dict[str, Any]:
+    """
+    Lê o arquivo e insere seus leads no lote, um registro por vez.
+
+    Raises:
+        ArquivoInvalidoError: se o arquivo não puder ser interpretado
+
+    Returns:
+        Dicionário com total_registros (linhas lidas), total_inseridos e preview
+    """
+    contadores = {"registros": 0}
+    preview: List[Dict[str, Any]] = []
+
+    registros = _contar(_registros(conteudo, engine), contadores)
+    leads = _extrair_leads(registros, mapeamento)
+    documentos = _montar_documentos(leads, lote_id, produto_id, created_at, preview)
+
+    total_inseridos = await inserir_em_lotes(leads_col, documentos, tamanho_lote)
+
+    return {
+        "total_registros": contadores["registros"],
+        "total_inseridos": total_inseridos,
+        "preview": preview
+    }
+
+
+# ==================== ESTÁGIOS DO PIPELINE ====================
+
+def _registros(conteudo: Union[bytes, BinaryIO], engine: str) -> Iterator[Dict[str, Any]]:
+    """Estágio de parsing, convertendo qualquer falha em ArquivoInvalidoError."""
+    try:
+        yield from iter_html_xls(conteudo, engine=engine)
+    except Exception as e:
+        raise ArquivoInvalidoError(str(e)) from e
+
+
+def _contar(itens: Iterable[Any], contadores: Dict[str, int]) -> Iterator[Any]:
+    for item in itens:
+        contadores["registros"] += 1
+        yield item
+
+
+def _extrair_leads(
+    registros: Iterable[Dict[str, Any]],
+    mapeamento: Dict[str, int]
+) -> Iterator[Dict[str, Any]]:
+    """Extrai os campos de cada registro, descartando os sem dados mínimos."""
+    for registro in registros:
+        lead_data = extrair_lead_do_registro(registro, mapeamento)
+
+        # Valida dados mínimos
+        if not lead_data.get("candidato_id") or not lead_data.get("nome"):
+            continue
+
+        yield lead_data
+
+
+def _montar_documentos(
+    leads: Iterable[Dict[str, Any]],
+    lote_id: str,
+    produto_id: str,
+    created_at: datetime,
+    preview: List[Dict[str, Any]]
+) -> Iterator[Dict[str, Any]]:
+    """Monta o documento de cada lead, guardando os primeiros em `preview`."""
+    for lead_data in leads:
+        if len(preview) < TAMANHO_PREVIEW:
+            preview.append(lead_data)
+
+        yield {
+            "lote_id": lote_id,
+            "produto_id": produto_id,
+            "candidato_id": lead_data["candidato_id"],
+            "nome": lead_data["nome"],
+            "celular": lead_data.get("celular", ""),
+            "cpf": lead_data.get("cpf", ""),
+            "curso_codigo": lead_data.get("curso_codigo", ""),
+            "curso_nome": lead_data.get("curso_nome", ""),
+            "polo": lead_data.get("polo", ""),
+            "inscrito_por": lead_data.get("inscrito_por", ""),
+            "status_mensalidade": lead_data.get("status_mensalidade", ""),
+            "dados_extras": lead_data.get("dados_extras", {}),
+            "status": StatusLead.PENDENTE.value,
+            "motivo_filtro": None,
+            "created_at": created_at
+        }
@@ -3,9 +3,14 @@ Serviço para parsing de arquivos XLS/HTML do Portal NEAD.
 """
 
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional
+from lxml import etree
+from typing import List, Dict, Any, Optional, Iterator, Union, BinaryIO
+import codecs
+import io
 import re
 
+_TAMANHO_BLOCO_LEITURA = 1024 * 1024
+
 
 def limpar_texto(texto: Any) -> str:
     """Remove espaços extras e caracteres especiais."""
@@ -27,17 +32,66 @@ def limpar_telefone(telefone: str) -> str:
     return numeros
 
 
-def parse_html_xls(conteudo: bytes, encoding: str = 'utf-8') -> List[Dict[str, Any]]:
+def parse_html_xls(
+    conteudo: Union[bytes, BinaryIO],
+    encoding: str = 'utf-8',
+    engine: str = 'bs4'
+) -> List[Dict[str, Any]]:
     """
     Faz o parsing de um arquivo XLS que na verdade é HTML.
     
     Args:
-        conteudo: Bytes do arquivo
+        conteudo: Bytes do arquivo (ou arquivo binário aberto)
         encoding: Encoding do arquivo
+        engine: Motor de parsing ('bs4' ou 'lxml')
         
     Returns:
         Lista de dicionários com os dados de cada linha
     """
+    return list(iter_html_xls(conteudo, encoding, engine))
+
+
+def iter_html_xls(
+    conteudo: Union[bytes, BinaryIO],
+    encoding: str = 'utf-8',
+    engine: str = 'bs4'
+) -> Iterator[Dict[str, Any]]:
+    """
+    Versão em gerador de `parse_html_xls`: devolve um registro por vez.
+    
+    O motor 'bs4' monta a árvore completa com BeautifulSoup; o motor 'lxml'
+    lê as linhas da tabela incrementalmente e descarta cada <tr> já processada.
+    Ambos produzem os mesmos registros.
+    """
+    if engine == 'bs4':
+        return _iter_bs4(conteudo, encoding)
+    if engine == 'lxml':
+        return _iter_lxml(conteudo, encoding)
+    raise ValueError(f"Engine de parser desconhecida: {engine}")
+
+
+def _montar_registro(headers: List[str], valores: List[str]) -> Optional[Dict[str, Any]]:
+    """Monta o registro de uma linha, ou None se a linha não tiver dados relevantes."""
+    # Pelo menos uma das 5 primeiras colunas preenchida
+    if not any(v for v in valores[:5] if v):
+        return None
+    
+    registro = {}
+    for i, valor in enumerate(valores):
+        if i < len(headers):
+            registro[headers[i]] = valor
+    
+    # Também guarda como lista para acesso por índice
+    registro['_valores'] = valores
+    registro['_num_colunas'] = len(valores)
+    return registro
+
+
+def _iter_bs4(conteudo: Union[bytes, BinaryIO], encoding: str) -> Iterator[Dict[str, Any]]:
+    """Parsing com BeautifulSoup (html.parser), carregando o documento inteiro."""
+    if not isinstance(conteudo, bytes):
+        conteudo = conteudo.read()
+    
     try:
         html = conteudo.decode(encoding)
     except UnicodeDecodeError:
@@ -55,38 +109,96 @@ def parse_html_xls(conteudo: bytes, encoding: str = 'utf-8') -> List[Dict[str, A
         raise ValueError("Arquivo não contém dados suficientes")
     
     # Primeira linha são os headers
-    headers_row = linhas[0]
-    headers = []
-    for cell in headers_row.find_all(['td', 'th']):
-        header_text = limpar_texto(cell.get_text())
-        headers.append(header_text)
+    headers = [limpar_texto(cell.get_text()) for cell in linhas[0].find_all(['td', 'th'])]
     
     # Processa as linhas de dados
-    dados = []
     for linha in linhas[1:]:
         celulas = linha.find_all('td')
         if len(celulas) == 0:
             continue
-            
-        registro = {}
-        valores = []
         
-        for i, celula in enumerate(celulas):
-            valor = limpar_texto(celula.get_text())
-            valores.append(valor)
-            
-            if i < len(headers):
-                registro[headers[i]] = valor
+        registro = _montar_registro(headers, [limpar_texto(c.get_text()) for c in celulas])
+        if registro is not None:
+            yield registro
+
+
+def _detectar_encoding(arquivo: BinaryIO, encoding: str) -> str:
+    """
+    Valida o arquivo no encoding informado sem carregá-lo inteiro em memória.
+    Retorna latin-1 (ISO-8859-1) se houver bytes inválidos, mesmo fallback do motor bs4.
+    """
+    inicio = arquivo.tell()
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        while bloco := arquivo.read(_TAMANHO_BLOCO_LEITURA):
+            decoder.decode(bloco)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return 'iso-8859-1'
+    finally:
+        arquivo.seek(inicio)
+    return encoding
+
+
+def _texto_celula(celula: Any) -> str:
+    """Texto de uma célula lxml, equivalente ao get_text() do BeautifulSoup."""
+    return limpar_texto(etree.tostring(celula, method='text', encoding='unicode', with_tail=False))
+
+
+def _iter_lxml(conteudo: Union[bytes, BinaryIO], encoding: str) -> Iterator[Dict[str, Any]]:
+    """Parsing incremental com lxml.etree.iterparse, uma <tr> por vez."""
+    arquivo = io.BytesIO(conteudo) if isinstance(conteudo, bytes) else conteudo
+    encoding = _detectar_encoding(arquivo, encoding)
+    
+    contexto = etree.iterparse(
+        arquivo,
+        events=('start', 'end'),
+        html=True,
+        encoding=encoding,
+        huge_tree=True
+    )
+    
+    tabela_encontrada = False
+    profundidade = 0  # Nível de aninhamento dentro da primeira tabela
+    total_linhas = 0
+    headers: Optional[List[str]] = None
+    
+    for evento, elem in contexto:
+        if elem.tag == 'table':
+            if evento == 'start' and (profundidade > 0 or not tabela_encontrada):
+                tabela_encontrada = True
+                profundidade += 1
+            elif evento == 'end' and profundidade > 0:
+                profundidade -= 1
+                if profundidade == 0:
+                    # Só a primeira tabela interessa
+                    break
+            continue
+        
+        if evento != 'end' or elem.tag != 'tr' or profundidade == 0:
+            continue
         
-        # Também guarda como lista para acesso por índice
-        registro['_valores'] = valores
-        registro['_num_colunas'] = len(valores)
+        total_linhas += 1
+        if headers is None:
+            # Primeira linha são os headers
+            headers = [_texto_celula(c) for c in elem.iter('td', 'th')]
+        else:
+            celulas = list(elem.iter('td'))
+            if celulas:
+                registro = _montar_registro(headers, [_texto_celula(c) for c in celulas])
+                if registro is not None:
+                    yield registro
         
-        # Só adiciona se tiver dados relevantes
-        if any(v for v in valores[:5] if v):  # Pelo menos uma das 5 primeiras colunas preenchida
-            dados.append(registro)
+        # Libera a linha já processada (exceto em tabelas aninhadas)
+        if profundidade == 1:
+            elem.clear(keep_tail=True)
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
     
-    return dados
+    if not tabela_encontrada:
+        raise ValueError("Nenhuma tabela encontrada no arquivo")
+    if total_linhas < 2:
+        raise ValueError("Arquivo não contém dados suficientes")
 
 
 def extrair_lead_do_registro(
@@ -1,29 +1,47 @@
 """
 Lead Manager API - Gerenciamento de Leads para Bitrix24
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from contextlib import asynccontextmanager
-from lead_manager_api.database import test_connection, close_connection, criar_indices
+from lead_manager_api.config import get_settings
+from lead_manager_api.database import get_mongo_client, close_connection
+from lead_manager_api.security import shutdown_password_executor
 from lead_manager_api.api.auth import router as auth_router
 from lead_manager_api.api.consultores import router as consultores_router
 from lead_manager_api.api.produtos import router as produtos_router
 from lead_manager_api.api.leads import router as leads_router
 from lead_manager_api.api.estatisticas import router as estatisticas_router
+from lead_manager_api.services.bitrix_service import obter_bitrix_service, fechar_bitrix_service
+from lead_manager_api.services.disparo_service import cancelar_disparos
+from lead_manager_api.services.health_service import (
+    iniciar_monitor_saude, parar_monitor_saude, status_saude, pronto
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 Iniciando Lead Manager API...")
-    if test_connection():
-        print("✓ Conexão com MongoDB estabelecida")
-        criar_indices()
-        print("✓ Índices criados/verificados")
+    # Cria o cliente (sem acessar o banco) para falhar já na inicialização se a
+    # configuração do MongoDB for inválida
+    get_mongo_client()
+    if get_settings().bitrix_webhook_url:
+        obter_bitrix_service()
     else:
-        print("✗ AVISO: Falha ao conectar com MongoDB")
+        print("✗ AVISO: BITRIX_WEBHOOK_URL não configurada; o envio de leads fica indisponível")
+    # Conexão, índices e retomada dos disparos ficam com o monitor de saúde:
+    # a API sobe mesmo com o MongoDB fora e /health/ready indica quando está pronta
+    iniciar_monitor_saude()
     yield
     print("🛑 Encerrando Lead Manager API...")
-    close_connection()
+    await parar_monitor_saude()
+    await cancelar_disparos()
+    await fechar_bitrix_service()
+    shutdown_password_executor()
+    await close_connection()
     print("✓ Conexões fechadas")
 
 
@@ -59,6 +77,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class LimiteTamanhoUpload:
+    """
+    Rejeita com 413 uploads maiores que `upload_max_bytes`: pelo Content-Length,
+    antes de ler o corpo, ou contando os bytes conforme chegam (uploads sem
+    Content-Length, como chunked), interrompendo a leitura no limite.
+    """
+
+    def __init__(self, app: ASGIApp, prefixo: str = "/leads/upload/"):
+        self.app = app
+        self.prefixo = prefixo
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(self.prefixo):
+            await self.app(scope, receive, send)
+            return
+
+        upload_max_bytes = get_settings().upload_max_bytes
+        detalhe = f"Arquivo excede o tamanho máximo de {upload_max_bytes // (1024 * 1024)} MB"
+
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > upload_max_bytes:
+            response = JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": detalhe}
+            )
+            await response(scope, receive, send)
+            return
+
+        recebidos = 0
+
+        async def receive_limitado() -> Message:
+            nonlocal recebidos
+            message = await receive()
+            if message["type"] == "http.request":
+                recebidos += len(message.get("body", b""))
+                if recebidos > upload_max_bytes:
+                    # Propaga pela leitura do formulário até o tratamento de HTTPException
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detalhe)
+            return message
+
+        await self.app(scope, receive_limitado, send)
+
+
+app.add_middleware(LimiteTamanhoUpload)
+
+
 # Routers
 app.include_router(auth_router)
 app.include_router(consultores_router)
@@ -79,8 +143,30 @@ async def root():
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    mongo_status = "healthy" if test_connection() else "unhealthy"
+    """Último estado verificado pelo monitor em segundo plano (não acessa o banco)."""
+    saude = status_saude()
+    mongo_status = "healthy" if saude["mongodb"] else "unhealthy"
     return {
-        "status": "healthy" if mongo_status == "healthy" else "degraded",
-        "mongodb": mongo_status
-    }
\ No newline at end of file
+        "status": "healthy" if pronto() else "degraded",
+        "mongodb": mongo_status,
+        "inicializado": saude["inicializado"],
+        "verificado_em": saude["verificado_em"].isoformat() if saude["verificado_em"] else None,
+        "erro": saude["erro"]
+    }
+
+
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    """Liveness: o processo está respondendo."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness():
+    """Readiness: MongoDB respondendo e índices criados; 503 caso contrário."""
+    if not pronto():
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "not_ready", "mongodb": "healthy" if status_saude()["mongodb"] else "unhealthy"}
+        )
+    return {"status": "ready"}
@@ -2,10 +2,11 @@
 Script de teste para verificar a conexão com o MongoDB.
 """
 
+import asyncio
 import sys
 
 
-def main():
+async def main():
     print("=" * 60)
     print("TESTE DE CONEXÃO COM MONGODB")
     print("=" * 60)
@@ -29,7 +30,7 @@ def main():
     try:
         from lead_manager_api.database import test_connection, get_database
         
-        if test_connection():
+        if await test_connection():
             print("  ✓ Conexão com MongoDB estabelecida com sucesso!")
         else:
             print("  ✗ Falha ao conectar com MongoDB")
@@ -42,7 +43,7 @@ def main():
     print("\n[3/3] Verificando acesso ao banco de dados...")
     try:
         db = get_database()
-        collections = db.list_collection_names()
+        collections = await db.list_collection_names()
         print(f"  ✓ Banco de dados '{settings.database_name}' acessível")
         print(f"  ✓ Coleções existentes: {collections if collections else '(nenhuma ainda)'}")
     except Exception as e:
@@ -51,7 +52,7 @@ def main():
     
     # Fechar conexão
     from lead_manager_api.database import close_connection
-    close_connection()
+    await close_connection()
     
     print("\n" + "=" * 60)
     print("TODOS OS TESTES PASSARAM COM SUCESSO! ✓")
@@ -59,4 +60,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,9 @@
+"""
+Configuração dos testes: variáveis obrigatórias do Settings com valores de
+teste, para que os módulos possam ser importados sem um .env.
+"""
+
+import os
+
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "chave-de-teste")
@@ -0,0 +1,198 @@
+"""
+Testes do serviço do Bitrix24: repetição por throttling e limitador de taxa.
+"""
+
+import asyncio
+import itertools
+
+import httpx
+import pytest
+
+from lead_manager_api.services import bitrix_service
+from lead_manager_api.services.bitrix_service import BitrixService, ERRO_LIMITE_EXCEDIDO, LimitadorTaxa
+
+_urls = itertools.count()
+
+
+def _servico(respostas, max_tentativas=3):
+    """BitrixService que responde com `respostas` em sequência e registra as chamadas."""
+    chamadas = []
+    fila = iter(respostas)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        chamadas.append(request.url.path)
+        return next(fila)
+
+    # URL única: o limitador de taxa é compartilhado por webhook
+    servico = BitrixService(
+        f"https://teste-{next(_urls)}.bitrix24.com.br/rest/1/token",
+        max_tentativas=max_tentativas,
+        backoff_inicial=0.0
+    )
+    servico._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return servico, chamadas
+
+
+def test_query_limit_exceeded_e_repetido():
+    servico, chamadas = _servico([
+        httpx.Response(503, json={"error": ERRO_LIMITE_EXCEDIDO, "error_description": "Too many requests"}),
+        httpx.Response(200, json={"result": 42}),
+    ])
+
+    resultado = asyncio.run(servico.criar_lead(nome="Ana", telefone="44999990000", consultor_bitrix_id=1))
+
+    assert resultado["sucesso"] and resultado["lead_id"] == 42
+    assert len(chamadas) == 2
+
+
+def test_429_e_repetido():
+    servico, chamadas = _servico([
+        httpx.Response(429, text="Too Many Requests"),
+        httpx.Response(200, json={"result": 7}),
+    ])
+
+    resultado = asyncio.run(servico.criar_lead(nome="Ana", telefone="44999990000", consultor_bitrix_id=1))
+
+    assert resultado["lead_id"] == 7
+    assert len(chamadas) == 2
+
+
+def test_503_sem_query_limit_nao_e_repetido():
+    # Um 503 de proxy pode vir depois de o lead já ter sido criado
+    servico, chamadas = _servico([
+        httpx.Response(503, text="<html>Service Unavailable</html>"),
+        httpx.Response(200, json={"result": 1}),
+    ])
+
+    resultado = asyncio.run(servico.criar_lead(nome="Ana", telefone="44999990000", consultor_bitrix_id=1))
+
+    assert not resultado["sucesso"]
+    assert len(chamadas) == 1
+
+
+def test_503_com_json_sem_erro_nao_conta_como_sucesso():
+    servico, _ = _servico([httpx.Response(503, json={"detail": "indisponível"})])
+
+    resultado = asyncio.run(servico.criar_lead(nome="Ana", telefone="44999990000", consultor_bitrix_id=1))
+
+    assert not resultado["sucesso"]
+    assert resultado["erro"]
+
+
+def test_ultima_tentativa_nao_reduz_a_taxa():
+    servico, chamadas = _servico(
+        [httpx.Response(429, text="Too Many Requests")],
+        max_tentativas=1
+    )
+    taxa = servico.limitador.taxa
+
+    resultado = asyncio.run(servico._post("crm.lead.add.json", {}))
+
+    assert resultado["error"] == ERRO_LIMITE_EXCEDIDO
+    assert len(chamadas) == 1
+    assert servico.limitador.taxa == taxa
+    assert servico.limitador._pausado_ate == 0.0
+
+
+# ==================== LIMITADOR DE TAXA ====================
+
+class Relogio:
+    """Relógio falso: `sleep` avança o tempo em vez de esperar."""
+
+    def __init__(self):
+        self.agora = 1000.0
+        self.esperas = []
+
+    def monotonic(self) -> float:
+        return self.agora
+
+    async def sleep(self, segundos: float) -> None:
+        self.esperas.append(segundos)
+        self.agora += segundos
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(bitrix_service.time, "monotonic", relogio.monotonic)
+    monkeypatch.setattr(bitrix_service.asyncio, "sleep", relogio.sleep)
+    return relogio
+
+
+def _adquirir(limitador, vezes=1):
+    async def _executar():
+        for _ in range(vezes):
+            await limitador.adquirir()
+    asyncio.run(_executar())
+
+
+def test_limitador_permite_rajada_ate_a_capacidade(relogio):
+    limitador = LimitadorTaxa(taxa=2, capacidade=3)
+
+    _adquirir(limitador, 3)
+    assert relogio.esperas == []
+
+    _adquirir(limitador)
+    assert relogio.esperas == [pytest.approx(0.5)]
+
+
+def test_limitador_repoe_tokens_com_o_tempo(relogio):
+    limitador = LimitadorTaxa(taxa=2, capacidade=3)
+    _adquirir(limitador, 3)
+
+    relogio.agora += 1
+    _adquirir(limitador, 2)
+    assert relogio.esperas == []
+
+
+def test_limitador_nao_acumula_alem_da_capacidade(relogio):
+    limitador = LimitadorTaxa(taxa=2, capacidade=3)
+    _adquirir(limitador, 3)
+
+    relogio.agora += 60
+    _adquirir(limitador, 4)
+    assert relogio.esperas == [pytest.approx(0.5)]
+
+
+def test_reduzir_divide_a_taxa_e_pausa(relogio):
+    limitador = LimitadorTaxa(taxa=2, capacidade=3)
+    inicio = relogio.agora
+
+    limitador.reduzir(pausa=5)
+    assert limitador.taxa == 1
+
+    # Nada sai antes do fim da pausa; durante ela o bucket volta a encher
+    _adquirir(limitador)
+    assert relogio.agora == pytest.approx(inicio + 5)
+
+
+def test_reduzir_respeita_a_taxa_minima(relogio):
+    limitador = LimitadorTaxa(taxa=1, capacidade=1, taxa_minima=0.3)
+
+    for _ in range(5):
+        limitador.reduzir(pausa=0)
+    assert limitador.taxa == 0.3
+
+
+def test_reduzir_nao_encurta_pausa_em_andamento(relogio):
+    limitador = LimitadorTaxa(taxa=4, capacidade=1)
+    inicio = relogio.agora
+
+    limitador.reduzir(pausa=10)
+    limitador.reduzir(pausa=1)
+
+    _adquirir(limitador)
+    assert relogio.agora >= inicio + 10
+
+
+def test_aumentar_recupera_a_taxa_ate_o_maximo(relogio):
+    limitador = LimitadorTaxa(taxa=10, capacidade=5)
+    limitador.reduzir(pausa=0)
+    assert limitador.taxa == 5
+
+    limitador.aumentar()
+    assert limitador.taxa == pytest.approx(5.5)
+
+    for _ in range(20):
+        limitador.aumentar()
+    assert limitador.taxa == 10
@@ -0,0 +1,101 @@
+"""
+Testes do cache em memória com TTL e descarte LRU.
+"""
+
+import pytest
+
+from lead_manager_api import cache as cache_module
+from lead_manager_api.cache import TTLCache
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(cache_module.time, "monotonic", relogio)
+    return relogio
+
+
+def test_item_expira_apos_o_ttl(relogio):
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+
+    relogio.agora += 9.9
+    assert cache.get("a") == 1
+
+    relogio.agora += 0.1
+    assert cache.get("a") is None
+    assert cache.get("a", "padrao") == "padrao"
+
+
+def test_set_renova_o_ttl(relogio):
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    relogio.agora += 8
+    cache.set("a", 2)
+    relogio.agora += 8
+
+    assert cache.get("a") == 2
+
+
+def test_ttl_zero_desabilita(relogio):
+    cache = TTLCache(ttl=0)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+
+
+def test_descarta_o_menos_usado_recentemente(relogio):
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" passa a ser o menos usado
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_set_de_chave_existente_nao_descarta_outra(relogio):
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+
+    assert cache.get("a") == 10
+    assert cache.get("b") == 2
+
+
+def test_item_expirado_nao_conta_como_uso(relogio):
+    cache = TTLCache(ttl=10, maxsize=2)
+    cache.set("a", 1)
+    relogio.agora += 11
+    assert cache.get("a") is None
+
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("b") == 2 and cache.get("c") == 3
+
+
+def test_invalidar_tudo_ou_por_predicado(relogio):
+    cache = TTLCache(ttl=60)
+    cache.set(("usuario", "ana"), 1)
+    cache.set(("usuario", "bia"), 2)
+    cache.set("dashboard", 3)
+
+    cache.invalidar(lambda chave: isinstance(chave, tuple) and chave[1] == "ana")
+    assert cache.get(("usuario", "ana")) is None
+    assert cache.get(("usuario", "bia")) == 2
+    assert cache.get("dashboard") == 3
+
+    cache.invalidar()
+    assert cache.get(("usuario", "bia")) is None
+    assert cache.get("dashboard") is None
@@ -0,0 +1,32 @@
+"""
+Testes da validação das configurações.
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from lead_manager_api.config import Settings
+
+
+@pytest.mark.parametrize("valor", [-1, 90, 300])
+def test_max_staleness_valido(valor):
+    assert Settings(mongodb_max_staleness_segundos=valor).mongodb_max_staleness_segundos == valor
+
+
+@pytest.mark.parametrize("valor", [-2, 0, 89])
+def test_max_staleness_invalido(valor):
+    with pytest.raises(ValidationError, match="pelo menos 90"):
+        Settings(mongodb_max_staleness_segundos=valor)
+
+
+@pytest.mark.parametrize("campo", ["upload_batch_size", "processamento_chunk_size"])
+def test_tamanhos_de_lote_precisam_ser_positivos(campo):
+    with pytest.raises(ValidationError):
+        Settings(**{campo: 0})
+    assert getattr(Settings(**{campo: 1}), campo) == 1
+
+
+def test_parser_engine_invalido_falha_na_inicializacao():
+    assert Settings(parser_engine="bs4").parser_engine == "bs4"
+    with pytest.raises(ValidationError):
+        Settings(parser_engine="lmxl")
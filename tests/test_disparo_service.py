@@ -0,0 +1,265 @@
+"""
+Testes do disparo de leads: reivindicação concorrente, round-robin, retomada
+por outra instância e reconciliação com o Bitrix24.
+
+Usam o mongomock atrás de uma casca assíncrona que espera um tempo aleatório
+a cada operação, para que os workers se intercalem como com um banco de verdade.
+Como no MongoDB, o update_many é aplicado documento a documento, podendo se
+intercalar com as operações de outros workers.
+"""
+
+import asyncio
+import random
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from lead_manager_api import database
+from lead_manager_api.services import disparo_service
+
+
+# ==================== BANCO FALSO ====================
+
+async def _latencia():
+    await asyncio.sleep(random.random() / 500)
+
+
+class _Cursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._iterador = None
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    def __aiter__(self):
+        self._iterador = iter(self._cursor)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterador)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        await _latencia()
+        return list(self._cursor)
+
+
+class _Colecao:
+    def __init__(self, colecao):
+        self._colecao = colecao
+
+    def with_options(self, **kwargs):
+        return self
+
+    def find(self, *args, **kwargs):
+        return _Cursor(self._colecao.find(*args, **kwargs))
+
+    async def update_many(self, filtro, atualizacao):
+        modificados = 0
+        for doc in list(self._colecao.find(filtro, {"_id": 1})):
+            await _latencia()
+            result = self._colecao.update_one({**filtro, "_id": doc["_id"]}, atualizacao)
+            modificados += result.modified_count
+        return SimpleNamespace(matched_count=modificados, modified_count=modificados)
+
+    def __getattr__(self, nome):
+        metodo = getattr(self._colecao, nome)
+
+        async def executar(*args, **kwargs):
+            await _latencia()
+            return metodo(*args, **kwargs)
+        return executar
+
+
+class _Banco:
+    def __init__(self, banco):
+        self._banco = banco
+
+    def __getitem__(self, nome):
+        return _Colecao(self._banco[nome])
+
+
+@pytest.fixture
+def db(monkeypatch):
+    banco = mongomock.MongoClient().db
+    monkeypatch.setattr(database, "_database", _Banco(banco))
+    return banco
+
+
+class BitrixFalso:
+    """Registra os leads enviados; `existentes` simula leads já criados no Bitrix24."""
+
+    def __init__(self, existentes=None):
+        self.chamadas = []
+        self.existentes = existentes or {}
+
+    async def _responder(self, dados):
+        self.chamadas.append([d["candidato_id"] for d in dados])
+        await _latencia()
+        return [{"sucesso": True, "lead_id": f"b{d['candidato_id']}"} for d in dados]
+
+    async def criar_lead(self, **dados):
+        return (await self._responder([dados]))[0]
+
+    async def criar_leads_em_lote(self, dados):
+        return await self._responder(dados)
+
+    async def buscar_leads_por_candidato(self, candidatos):
+        return {c: self.existentes[c] for c in candidatos if c in self.existentes}
+
+    @property
+    def enviados(self):
+        return [c for chamada in self.chamadas for c in chamada]
+
+
+def _cenario(db, leads, consultores=1, owner="o1", heartbeat=None):
+    """Cria lote, produto, consultores, `leads` processados e o disparo do lote."""
+    produto_id = db.produtos.insert_one({"nome": "Produto"}).inserted_id
+    ids_consultores = [
+        str(db.consultores.insert_one({"nome": f"C{i}", "bitrix_id": 100 + i}).inserted_id)
+        for i in range(consultores)
+    ]
+    db.lotes.insert_one({"_id": "L1", "produto_id": str(produto_id)})
+    db.leads.insert_many([
+        {"_id": i, "lote_id": "L1", "candidato_id": f"{i:04d}", "nome": "Ana", "celular": "44999990000",
+         "status": "processado"}
+        for i in range(leads)
+    ])
+    db.disparos.insert_one({
+        "_id": "D1", "lote_id": "L1", "produto_id": str(produto_id), "consultores_ids": ids_consultores,
+        "owner": owner, "status": "em_andamento", "enviados_sucesso": 0, "enviados_erro": 0,
+        "heartbeat_em": heartbeat or datetime.now(timezone.utc)
+    })
+    return ids_consultores
+
+
+def _enviar(db, bitrix, owner="o1", concorrencia=5, tamanho_batch=None):
+    consultores = asyncio.run(disparo_service._carregar_consultores(db.disparos.find_one({"_id": "D1"})["consultores_ids"]))
+    produto = db.produtos.find_one()
+    lote = db.lotes.find_one({"_id": "L1"})
+    return asyncio.run(disparo_service.enviar_leads(
+        "D1", owner, consultores, produto, lote, bitrix,
+        concorrencia=concorrencia, tamanho_batch=tamanho_batch
+    ))
+
+
+# ==================== ENVIO CONCORRENTE ====================
+
+@pytest.mark.parametrize("semente", range(3))
+def test_workers_concorrentes_nao_repetem_nem_dividem_grupos(db, semente):
+    random.seed(semente)
+    _cenario(db, leads=230)
+    bitrix = BitrixFalso()
+
+    totais = _enviar(db, bitrix, concorrencia=5, tamanho_batch=50)
+
+    assert sorted(bitrix.enviados) == [f"{i:04d}" for i in range(230)]
+    assert sorted(len(c) for c in bitrix.chamadas) == [30, 50, 50, 50, 50]
+    assert totais == {"enviados_sucesso": 230, "enviados_erro": 0}
+    assert db.leads.count_documents({"status": "enviado"}) == 230
+    assert db.leads.count_documents({"claim_token": {"$exists": True}}) == 0
+    assert db.historico_candidatos.count_documents({}) == 230
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_round_robin_segue_a_ordem_dos_leads(db, semente):
+    random.seed(semente)
+    consultores = _cenario(db, leads=20, consultores=3)
+    bitrix = BitrixFalso()
+
+    _enviar(db, bitrix, concorrencia=4)
+
+    assert len(bitrix.enviados) == 20
+    for lead in db.leads.find():
+        assert lead["consultor_id"] == consultores[lead["_id"] % 3]
+
+
+def test_dono_deslocado_nao_reivindica_leads(db):
+    _cenario(db, leads=10, owner="o2")
+    bitrix = BitrixFalso()
+
+    _enviar(db, bitrix, owner="o1")
+
+    assert bitrix.chamadas == []
+    assert db.leads.count_documents({"status": "processado"}) == 10
+
+
+# ==================== RETOMADA ====================
+
+def test_assume_disparo_com_heartbeat_expirado(db):
+    _cenario(db, leads=1, heartbeat=datetime.now(timezone.utc) - timedelta(days=1))
+
+    owner = asyncio.run(disparo_service.assumir_disparo("D1"))
+
+    assert owner and owner != "o1"
+    assert db.disparos.find_one({"_id": "D1"})["owner"] == owner
+    # Com o heartbeat renovado, ninguém mais assume
+    assert asyncio.run(disparo_service.assumir_disparo("D1")) is None
+
+
+def test_nao_assume_disparo_com_heartbeat_em_dia(db):
+    _cenario(db, leads=1)
+
+    assert asyncio.run(disparo_service.assumir_disparo("D1")) is None
+    assert db.disparos.find_one({"_id": "D1"})["owner"] == "o1"
+
+
+def test_resultado_atrasado_do_dono_anterior_nao_conta(db):
+    _cenario(db, leads=1)
+    lote = db.lotes.find_one({"_id": "L1"})
+    antigo = asyncio.run(disparo_service._reivindicar_leads("L1", "D1", 1))
+
+    # O lead volta para a fila (retomada) e é reivindicado de novo pelo novo dono
+    asyncio.run(disparo_service._devolver_leads({"_id": 0}))
+    novo = asyncio.run(disparo_service._reivindicar_leads("L1", "D1", 1))
+    assert novo[0]["claim_token"] != antigo[0]["claim_token"]
+
+    contagem = asyncio.run(disparo_service._registrar_resultados(
+        [(antigo[0], {"_id": "C"})], [{"sucesso": True, "lead_id": "b1"}], lote
+    ))
+
+    assert contagem == (0, 0)
+    lead = db.leads.find_one({"_id": 0})
+    assert lead["status"] == "enviando" and lead["claim_token"] == novo[0]["claim_token"]
+    assert db.historico_candidatos.count_documents({}) == 0
+    assert db.estatisticas_consultores.count_documents({}) == 0
+
+
+def test_reconciliacao_marca_como_enviados_os_leads_ja_no_bitrix(db):
+    consultores = _cenario(db, leads=3)
+    antigo = datetime.now(timezone.utc) - timedelta(days=1)
+    db.leads.update_many({}, {"$set": {"status": "enviando", "disparo_id": "D1", "claimed_em": antigo}})
+    for lead in db.leads.find():
+        db.leads.update_one({"_id": lead["_id"]}, {"$set": {"claim_token": f"t{lead['_id']}"}})
+    # Reivindicado há pouco: a execução anterior pode estar só lenta
+    db.leads.update_one({"_id": 2}, {"$set": {"claimed_em": datetime.now(timezone.utc)}})
+
+    bitrix = BitrixFalso(existentes={"0000": {"ID": "900", "ASSIGNED_BY_ID": "100"}})
+    lote = db.lotes.find_one({"_id": "L1"})
+    consultores_docs = asyncio.run(disparo_service._carregar_consultores(consultores))
+    progresso = disparo_service._Progresso("D1", "o1", 1)
+
+    espera = asyncio.run(disparo_service._reconciliar_leads_enviando(
+        "D1", lote, consultores_docs, bitrix, progresso
+    ))
+
+    enviado = db.leads.find_one({"_id": 0})
+    assert enviado["status"] == "enviado"
+    assert enviado["bitrix_lead_id"] == "900"
+    assert enviado["consultor_id"] == consultores[0]
+    assert db.leads.find_one({"_id": 1})["status"] == "processado"
+    assert db.leads.find_one({"_id": 2})["status"] == "enviando"
+    assert espera is not None and espera > 0
+    assert progresso.totais == {"enviados_sucesso": 1, "enviados_erro": 0}
+    assert db.historico_candidatos.count_documents({}) == 1
@@ -0,0 +1,205 @@
+"""
+Testes da série temporal de estatísticas: intervalos no fuso do usuário,
+inclusive nas trocas de horário de verão e na virada do dia em UTC.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi import HTTPException
+
+from lead_manager_api.api import estatisticas
+from lead_manager_api.api.estatisticas import _inicios_periodos, _intervalos, _serie_temporal, _truncar
+
+UTC = timezone.utc
+NOVA_YORK = ZoneInfo("America/New_York")
+SAO_PAULO = ZoneInfo("America/Sao_Paulo")
+FUSO_UTC = ZoneInfo("UTC")
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=UTC)
+
+
+def _em_utc(momentos):
+    return [m.astimezone(UTC) for m in momentos]
+
+
+# ==================== _truncar ====================
+
+def test_truncar_dia_no_fuso_local_e_nao_em_utc():
+    # 01:00 UTC de 1º de janeiro ainda é 31 de dezembro em São Paulo (UTC-3)
+    inicio = _truncar(_utc(2026, 1, 1, 1, 30), "dia", SAO_PAULO)
+
+    assert inicio.astimezone(UTC) == _utc(2025, 12, 31, 3)
+
+
+def test_truncar_semana_comeca_no_domingo():
+    # 1º de janeiro de 2026 é uma quinta-feira
+    inicio = _truncar(_utc(2026, 1, 1, 12), "semana", UTC)
+    assert inicio == _utc(2025, 12, 28)
+
+    # Um domingo é o início da própria semana
+    assert _truncar(_utc(2025, 12, 28, 23), "semana", UTC) == _utc(2025, 12, 28)
+
+
+def test_truncar_dia_sem_meia_noite():
+    # Em 2018, o horário de verão de São Paulo começou à meia-noite de 4/11:
+    # o dia começa às 01:00 (-02), isto é, 03:00 UTC
+    inicio = _truncar(_utc(2018, 11, 4, 15), "dia", SAO_PAULO)
+
+    assert inicio.astimezone(UTC) == _utc(2018, 11, 4, 3)
+
+
+# ==================== _intervalos ====================
+
+def test_intervalos_por_hora_no_inicio_do_horario_de_verao():
+    # 08/03/2026: em Nova York, 02:00 EST vira 03:00 EDT
+    intervalos = list(_intervalos(_utc(2026, 3, 8, 5), _utc(2026, 3, 8, 10), "hora", NOVA_YORK))
+
+    assert _em_utc(intervalos) == [_utc(2026, 3, 8, h) for h in range(5, 10)]
+    assert [i.hour for i in intervalos] == [0, 1, 3, 4, 5]
+
+
+def test_intervalos_por_hora_no_fim_do_horario_de_verao():
+    # 01/11/2026: em Nova York, 02:00 EDT volta para 01:00 EST
+    intervalos = list(_intervalos(_utc(2026, 11, 1, 4), _utc(2026, 11, 1, 9), "hora", NOVA_YORK))
+
+    # A hora repetida aparece duas vezes, com offsets diferentes
+    assert _em_utc(intervalos) == [_utc(2026, 11, 1, h) for h in range(4, 9)]
+    assert [i.hour for i in intervalos] == [0, 1, 1, 2, 3]
+    assert len(set(_em_utc(intervalos))) == 5
+
+
+def test_intervalos_por_dia_atravessando_o_horario_de_verao():
+    intervalos = list(_intervalos(_utc(2026, 3, 7, 12), _utc(2026, 3, 10, 12), "dia", NOVA_YORK))
+
+    assert [(i.day, i.hour) for i in intervalos] == [(7, 0), (8, 0), (9, 0), (10, 0)]
+    duracoes = [b.astimezone(UTC) - a.astimezone(UTC) for a, b in zip(intervalos, intervalos[1:])]
+    assert duracoes == [timedelta(hours=24), timedelta(hours=23), timedelta(hours=24)]
+
+
+def test_intervalos_por_dia_sem_meia_noite():
+    intervalos = list(_intervalos(_utc(2018, 11, 3, 12), _utc(2018, 11, 5, 12), "dia", SAO_PAULO))
+
+    assert _em_utc(intervalos) == [_utc(2018, 11, 3, 3), _utc(2018, 11, 4, 3), _utc(2018, 11, 5, 2)]
+
+
+def test_intervalos_por_semana():
+    intervalos = list(_intervalos(_utc(2026, 1, 1), _utc(2026, 1, 20), "semana", UTC))
+
+    assert intervalos == [_utc(2025, 12, 28), _utc(2026, 1, 4), _utc(2026, 1, 11), _utc(2026, 1, 18)]
+
+
+# ==================== _inicios_periodos ====================
+
+def test_periodos_comecam_na_meia_noite_local():
+    # 22:30 de 10/03 em São Paulo já é 11/03 em UTC
+    periodos = _inicios_periodos(_utc(2026, 3, 11, 1, 30), SAO_PAULO)
+
+    assert periodos["hoje"].astimezone(UTC) == _utc(2026, 3, 10, 3)
+    assert periodos["hoje"] == _truncar(_utc(2026, 3, 11, 1, 30), "dia", SAO_PAULO)
+    assert periodos["semana"].astimezone(UTC) == _utc(2026, 3, 3, 3)
+    assert periodos["mes"].astimezone(UTC) == _utc(2026, 2, 8, 3)
+
+
+def test_periodos_contam_dias_locais_no_horario_de_verao():
+    periodos = _inicios_periodos(_utc(2026, 3, 10, 12), NOVA_YORK)
+
+    # A semana atravessa a troca de horário e ainda começa à meia-noite local
+    assert periodos["semana"].hour == 0
+    assert periodos["semana"].astimezone(UTC) == _utc(2026, 3, 3, 5)
+    assert periodos["hoje"].astimezone(UTC) == _utc(2026, 3, 10, 4)
+
+
+# ==================== _serie_temporal ====================
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Colecao:
+    """Coleção falsa: `aggregate` devolve os grupos já calculados, como o Mongo."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.pipelines = []
+
+    async def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return _Cursor(self.docs)
+
+
+@pytest.fixture
+def colecao(monkeypatch):
+    colecao = _Colecao([])
+    monkeypatch.setattr(estatisticas, "get_estatisticas_consultores_collection", lambda leitura=None: colecao)
+    return colecao
+
+
+def test_serie_preenche_intervalos_vazios_na_troca_de_horario(colecao):
+    # O $dateTrunc devolve o início de cada dia em UTC, sem fuso
+    colecao.docs = [
+        {"_id": {"inicio": datetime(2018, 11, 3, 3)}, "leads": 2},
+        {"_id": {"inicio": datetime(2018, 11, 5, 2)}, "leads": 5},
+    ]
+
+    serie = asyncio.run(_serie_temporal(_utc(2018, 11, 3, 3), _utc(2018, 11, 6, 2), "dia", SAO_PAULO))
+
+    assert [p["leads"] for p in serie["pontos"]] == [2, 0, 5]
+    assert _em_utc(p["inicio"] for p in serie["pontos"]) == [
+        _utc(2018, 11, 3, 3), _utc(2018, 11, 4, 3), _utc(2018, 11, 5, 2)
+    ]
+    assert serie["total"] == 7
+
+    truncamento = colecao.pipelines[0][1]["$group"]["_id"]["inicio"]["$dateTrunc"]
+    assert truncamento == {"date": "$hora", "unit": "day", "timezone": "America/Sao_Paulo"}
+
+
+def test_serie_na_hora_repetida_nao_mistura_os_intervalos(colecao):
+    colecao.docs = [
+        {"_id": {"inicio": datetime(2026, 11, 1, 5)}, "leads": 1},
+        {"_id": {"inicio": datetime(2026, 11, 1, 6)}, "leads": 3},
+    ]
+
+    serie = asyncio.run(_serie_temporal(_utc(2026, 11, 1, 4), _utc(2026, 11, 1, 8), "hora", NOVA_YORK))
+
+    assert [(p["inicio"].hour, p["leads"]) for p in serie["pontos"]] == [(0, 0), (1, 1), (1, 3), (2, 0)]
+
+
+def test_serie_agrupada_soma_por_grupo(colecao, monkeypatch):
+    colecao.docs = [
+        {"_id": {"inicio": datetime(2026, 1, 4), "grupo": "a"}, "leads": 1},
+        {"_id": {"inicio": datetime(2026, 1, 4), "grupo": "b"}, "leads": 2},
+        {"_id": {"inicio": datetime(2026, 1, 11), "grupo": "a"}, "leads": 4},
+    ]
+
+    async def _sem_nomes(collection, ids):
+        return {}
+
+    monkeypatch.setattr(estatisticas, "_nomes_por_id", _sem_nomes)
+    monkeypatch.setattr(estatisticas, "get_produtos_collection", lambda leitura=None: None)
+    serie = asyncio.run(_serie_temporal(_utc(2026, 1, 4), _utc(2026, 1, 18), "semana", FUSO_UTC, "produto"))
+
+    assert [p["grupos"] for p in serie["pontos"]] == [{"a": 1, "b": 2}, {"a": 4}]
+    assert [(g["id"], g["total"]) for g in serie["grupos"]] == [("a", 5), ("b", 2)]
+
+
+def test_serie_longa_demais_retorna_400(colecao):
+    with pytest.raises(HTTPException) as erro:
+        asyncio.run(_serie_temporal(_utc(2026, 1, 1), _utc(2027, 1, 1), "hora", FUSO_UTC))
+
+    assert erro.value.status_code == 400
+    assert colecao.pipelines == []
@@ -0,0 +1,65 @@
+"""
+Testes da listagem e da exportação de leads.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from lead_manager_api.api import leads
+from lead_manager_api.api.leads import CAMPOS_LISTAGEM_LEADS, _conferir_limite_xlsx, _projecao_leads
+from lead_manager_api.services import exportacao_service
+
+PADRAO = {campo: 1 for campo in CAMPOS_LISTAGEM_LEADS}
+
+
+@pytest.mark.parametrize("campos", [None, "", ",", " ", " , ,"])
+def test_sem_campos_usa_os_padrao(campos):
+    # Uma projeção vazia faria o MongoDB retornar o documento inteiro
+    assert _projecao_leads(campos, False) == PADRAO
+
+
+def test_campos_pedidos_e_dados_extras():
+    assert _projecao_leads(" nome, cpf ,", True) == {"nome": 1, "cpf": 1, "dados_extras": 1}
+
+
+def test_campo_invalido_retorna_400():
+    with pytest.raises(HTTPException) as erro:
+        _projecao_leads("nome,$where", False)
+    assert erro.value.status_code == 400
+
+
+class _Colecao:
+    def __init__(self, total):
+        self.total = total
+
+    async def count_documents(self, filtro, limit=0):
+        return min(self.total, limit) if limit else self.total
+
+
+async def _docs(n):
+    for i in range(n):
+        yield {"nome": f"Lead {i}"}
+
+
+async def _ler(conteudo):
+    return b"".join([pedaco async for pedaco in conteudo])
+
+
+def test_xlsx_acima_do_limite_retorna_400(monkeypatch):
+    monkeypatch.setattr(leads, "MAX_LINHAS_XLSX", 3)
+
+    asyncio.run(_conferir_limite_xlsx(_Colecao(3), {}))
+    with pytest.raises(HTTPException) as erro:
+        asyncio.run(_conferir_limite_xlsx(_Colecao(4), {}))
+    assert erro.value.status_code == 400
+    assert "csv" in erro.value.detail
+
+
+def test_xlsx_nao_trunca_em_silencio(monkeypatch):
+    monkeypatch.setattr(exportacao_service, "MAX_LINHAS_XLSX", 3)
+
+    assert asyncio.run(_ler(exportacao_service.gerar_xlsx(_docs(3), ["nome"]))).startswith(b"PK")
+    with pytest.raises(ValueError, match="limite"):
+        asyncio.run(_ler(exportacao_service.gerar_xlsx(_docs(4), ["nome"])))
@@ -0,0 +1,156 @@
+"""
+Testes da paginação por cursor (keyset).
+"""
+
+import base64
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from lead_manager_api.pagination import codificar_cursor, decodificar_cursor, filtro_apos
+
+
+# ==================== AVALIAÇÃO DOS FILTROS ====================
+# Reproduz, para os operadores que filtro_apos gera, a semântica do MongoDB:
+# nulo e campo ausente são equivalentes, e $gt/$lt só comparam valores do
+# mesmo tipo (nulos nunca casam).
+
+def _casa(doc, filtro):
+    for chave, condicao in filtro.items():
+        if chave == "$or":
+            if not any(_casa(doc, sub) for sub in condicao):
+                return False
+            continue
+
+        valor = doc.get(chave)
+        if not isinstance(condicao, dict):
+            if valor != condicao:
+                return False
+            continue
+
+        for operador, alvo in condicao.items():
+            if operador == "$ne":
+                ok = valor != alvo
+            elif valor is None or alvo is None or type(valor) is not type(alvo):
+                ok = False
+            elif operador == "$gt":
+                ok = valor > alvo
+            elif operador == "$lt":
+                ok = valor < alvo
+            else:
+                raise AssertionError(f"operador inesperado: {operador}")
+            if not ok:
+                return False
+    return True
+
+
+def _ordenar(docs, ordem):
+    """Ordena como o MongoDB: nulos antes de qualquer valor."""
+    resultado = list(docs)
+    for campo, direcao in reversed(ordem):
+        resultado.sort(
+            key=lambda d: (d.get(campo) is not None, d.get(campo) if d.get(campo) is not None else 0),
+            reverse=direcao == -1
+        )
+    return resultado
+
+
+def _percorrer(docs, ordem, tamanho):
+    """Pagina `docs` com cursores, como `paginar`, e retorna a ordem visitada."""
+    visitados = []
+    cursor = None
+    while True:
+        candidatos = docs
+        if cursor:
+            filtro = filtro_apos(ordem, decodificar_cursor(cursor, ordem))
+            candidatos = [d for d in docs if _casa(d, filtro)]
+        pagina = _ordenar(candidatos, ordem)[:tamanho]
+        if not pagina:
+            return visitados
+        visitados.extend(pagina)
+        cursor = codificar_cursor(pagina[-1], ordem)
+
+
+# ==================== TESTES ====================
+
+def test_cursor_ida_e_volta_preserva_tipos():
+    ordem = [("created_at", -1), ("_id", -1)]
+    doc = {"_id": ObjectId(), "created_at": datetime(2026, 3, 1, 12, 30)}
+
+    valores = decodificar_cursor(codificar_cursor(doc, ordem), ordem)
+
+    assert valores == [doc["created_at"], doc["_id"]]
+    assert isinstance(valores[1], ObjectId)
+
+
+def test_cursor_com_campo_ausente_vira_nulo():
+    ordem = [("enviado_em", -1), ("_id", 1)]
+    assert decodificar_cursor(codificar_cursor({"_id": 7}, ordem), ordem) == [None, 7]
+
+
+@pytest.mark.parametrize("cursor", [
+    "nao-e-base64!!",
+    base64.urlsafe_b64encode(b"{nao json").decode(),
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+    base64.urlsafe_b64encode(b"[1]").decode(),
+    base64.urlsafe_b64encode(b'[{"$oid": "zz"}, 1]').decode(),
+])
+def test_cursor_invalido_retorna_400(cursor):
+    with pytest.raises(HTTPException) as erro:
+        decodificar_cursor(cursor, [("created_at", -1), ("_id", -1)])
+    assert erro.value.status_code == 400
+
+
+def test_filtro_apos_um_campo():
+    assert filtro_apos([("_id", 1)], [5]) == {"_id": {"$gt": 5}}
+
+
+def test_filtro_apos_direcoes_mistas():
+    filtro = filtro_apos([("lote_id", 1), ("created_at", -1), ("_id", 1)], ["L", 10, 3])
+
+    assert filtro == {"$or": [
+        {"lote_id": {"$gt": "L"}},
+        {"lote_id": "L", "$or": [{"created_at": {"$lt": 10}}, {"created_at": None}]},
+        {"lote_id": "L", "created_at": 10, "_id": {"$gt": 3}},
+    ]}
+
+
+def test_filtro_apos_nulo_em_ordem_crescente():
+    filtro = filtro_apos([("enviado_em", 1), ("_id", 1)], [None, 3])
+
+    assert filtro == {"$or": [
+        {"enviado_em": {"$ne": None}},
+        {"enviado_em": None, "_id": {"$gt": 3}},
+    ]}
+
+
+def test_filtro_apos_nulo_em_ordem_decrescente():
+    # Depois de um nulo em ordem decrescente só vêm outros nulos
+    filtro = filtro_apos([("enviado_em", -1), ("_id", 1)], [None, 3])
+
+    assert filtro == {"enviado_em": None, "_id": {"$gt": 3}}
+
+
+DOCS = [
+    {"_id": i, "grupo": grupo, "valor": valor}
+    for i, (grupo, valor) in enumerate([
+        ("a", 3), ("a", None), ("b", 1), ("a", 3), ("b", None),
+        ("a", 1), ("b", 2), ("a", None), ("b", 2), ("a", 2), ("b", 1),
+    ])
+] + [{"_id": 11, "grupo": "a"}, {"_id": 12, "grupo": "b"}]
+
+
+@pytest.mark.parametrize("ordem", [
+    [("valor", 1), ("_id", 1)],
+    [("valor", -1), ("_id", -1)],
+    [("valor", -1), ("_id", 1)],
+    [("grupo", 1), ("valor", -1), ("_id", 1)],
+    [("grupo", -1), ("valor", 1), ("_id", -1)],
+])
+@pytest.mark.parametrize("tamanho", [1, 2, 5])
+def test_percorre_todas_as_paginas_sem_repetir(ordem, tamanho):
+    visitados = _percorrer(DOCS, ordem, tamanho)
+
+    assert [d["_id"] for d in visitados] == [d["_id"] for d in _ordenar(DOCS, ordem)]
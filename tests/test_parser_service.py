@@ -0,0 +1,105 @@
+"""
+Testes do parser dos arquivos XLS/HTML do Portal NEAD: os motores 'bs4' e
+'lxml' devem produzir os mesmos registros.
+"""
+
+import io
+
+import pytest
+
+from lead_manager_api.services import parser_service
+from lead_manager_api.services.parser_service import parse_html_xls
+
+# Cabeçalho no formato do Portal NEAD (37 colunas, como no mapeamento padrão)
+COLUNAS = [f"Coluna {i}" for i in range(37)]
+COLUNAS[0] = "Candidato"
+COLUNAS[3] = "Nome"
+COLUNAS[14] = "Celular"
+COLUNAS[31] = "Inscrito Por"
+
+
+def _linha(i: int) -> str:
+    celulas = [""] * 37
+    celulas[0] = str(1000 + i)
+    celulas[3] = f"  João   da Silva {i} "
+    celulas[5] = "Maringá&nbsp;-&nbsp;PR"
+    celulas[12] = "<b>PAGO</b>" if i % 3 == 0 else "Em aberto"
+    celulas[14] = "(44) 99999-{:04d}".format(i)
+    celulas[31] = "6111 <span>DIGITAL</span>"
+    celulas[36] = "Gestão\n  Comercial"
+    return "<tr>" + "".join(f"<td>{c}</td>" for c in celulas) + "</tr>"
+
+
+def _amostra(linhas: int = 20) -> str:
+    cabecalho = "<tr>" + "".join(f"<th>{c}</th>" for c in COLUNAS) + "</tr>"
+    corpo = [_linha(i) for i in range(linhas)]
+    # Linha vazia, linha sem as 5 primeiras colunas e linha com menos colunas
+    corpo.insert(3, "<tr></tr>")
+    corpo.insert(5, "<tr>" + "<td></td>" * 5 + "<td>só polo</td></tr>")
+    corpo.insert(7, "<tr><td>999</td><td>curta</td></tr>")
+    return (
+        "<html><head><title>Relatório</title></head><body>"
+        f"<table border='1'>{cabecalho}{''.join(corpo)}</table>"
+        # Só a primeira tabela é lida
+        "<table><tr><td>ignorar</td></tr><tr><td>1</td><td>2</td></tr></table>"
+        "</body></html>"
+    )
+
+
+def _registros(conteudo: bytes, engine: str, encoding: str = "utf-8"):
+    return parse_html_xls(conteudo, encoding=encoding, engine=engine)
+
+
+def test_engines_produzem_os_mesmos_registros():
+    conteudo = _amostra().encode("utf-8")
+
+    bs4 = _registros(conteudo, "bs4")
+    lxml = _registros(conteudo, "lxml")
+
+    assert lxml == bs4
+    assert len(bs4) == 21  # 20 linhas + a linha curta; vazias são ignoradas
+    assert bs4[0]["Nome"] == "João da Silva 0"
+    assert bs4[0]["Coluna 5"] == "Maringá - PR"
+    assert bs4[0]["Inscrito Por"] == "6111 DIGITAL"
+
+
+def test_engines_com_arquivo_latin1_usam_o_fallback():
+    conteudo = _amostra().encode("latin-1")
+    with pytest.raises(UnicodeDecodeError):
+        conteudo.decode("utf-8")
+
+    bs4 = _registros(conteudo, "bs4")
+    lxml = _registros(conteudo, "lxml")
+
+    assert lxml == bs4
+    assert bs4[0]["Nome"] == "João da Silva 0"
+    assert bs4[0]["Coluna 36"] == "Gestão Comercial"
+
+
+def test_detectar_encoding_em_blocos(monkeypatch):
+    # Blocos pequenos: o caractere multibyte fica dividido entre dois blocos
+    monkeypatch.setattr(parser_service, "_TAMANHO_BLOCO_LEITURA", 7)
+    utf8 = io.BytesIO("abcdeçã".encode("utf-8"))
+    latin1 = io.BytesIO("abcdeçã".encode("latin-1"))
+
+    assert parser_service._detectar_encoding(utf8, "utf-8") == "utf-8"
+    assert parser_service._detectar_encoding(latin1, "utf-8") == "iso-8859-1"
+    assert utf8.tell() == 0 and latin1.tell() == 0
+
+
+def test_lxml_le_de_arquivo_aberto_com_muitas_linhas():
+    conteudo = _amostra(linhas=3000).encode("utf-8")
+
+    assert _registros(io.BytesIO(conteudo), "lxml") == _registros(conteudo, "bs4")
+
+
+@pytest.mark.parametrize("engine", ["bs4", "lxml"])
+def test_arquivo_sem_tabela(engine):
+    with pytest.raises(ValueError, match="Nenhuma tabela"):
+        _registros(b"<html><body><p>vazio</p></body></html>", engine)
+
+
+@pytest.mark.parametrize("engine", ["bs4", "lxml"])
+def test_tabela_so_com_cabecalho(engine):
+    with pytest.raises(ValueError, match="dados suficientes"):
+        _registros(b"<table><tr><th>A</th></tr></table>", engine)